@@ -87,7 +87,7 @@ async def login(
     except EntityDoesNotExist as existence_error:
         raise wrong_login_error from existence_error
 
-    if not user.check_password(user_login.password):
+    if not await user.check_password_async(user_login.password):
         raise wrong_login_error
 
     if token_exp_minutes:
@@ -1,18 +1,28 @@
+import asyncio
+from typing import Optional
+
 from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
-from fastapi_websocket_pubsub.pub_sub_server import PubSubEndpoint
+from fastapi.responses import StreamingResponse
 from fastapi_websocket_rpc.logger import LoggingModes
 from fastapi_websocket_rpc.logger import logging_config as ws_logging_config
 
 from app.api.dependencies.authentication import get_current_user_authorizer
 from app.api.dependencies.database import get_repository
 from app.core.config import get_app_settings
-from app.db.errors import EntityDoesNotExist
-from app.db.repositories.messages import MessagesRepository
+from app.db.errors import EntityAccessDenied, EntityDoesNotExist
+from app.db.repositories.messages import MessagesRepository, message_from_row
 from app.models.domain.messages import Message
-from app.models.schemas.messages import MessageInCreate, MessagesInResponse
+from app.models.schemas.messages import (MessageInCreate,
+                                         MessagesIdsInResponse,
+                                         MessagesInBulkCreate,
+                                         MessagesInResponse,
+                                         MessagesStatusesInBatchUpdate,
+                                         MessagesStatusesInResponse)
 from app.models.schemas.users import User
 from app.resources import strings
-from app.services.sockets import publish_content
+from app.services import export, paging, serialization
+from app.services.broadcasting import get_broadcaster
+from app.services.topics import get_user_messages_topic
 
 ws_logging_config.set_mode(
     LoggingModes.LOGURU, level=get_app_settings().logging_level
@@ -20,8 +30,8 @@ ws_logging_config.set_mode(
 settings = get_app_settings()
 router = APIRouter()
 
-ws_endpoint = PubSubEndpoint()
-ws_endpoint.register_route(router, "/subscribe")
+broadcaster = get_broadcaster()
+broadcaster.endpoint.register_route(router, "/subscribe")
 
 
 @router.get(
@@ -30,7 +40,7 @@ ws_endpoint.register_route(router, "/subscribe")
     name="messages:get-messages",
     status_code=status.HTTP_200_OK,
     summary="Get user's messages",
-)  # TODO: Do nice paging
+)
 async def get_messages(
     messages_repo: MessagesRepository = Depends(get_repository(MessagesRepository)),
     sent_included: bool = Query(
@@ -38,15 +48,132 @@ async def get_messages(
         title="With sent messages",
         description="Include sent messages in response",
     ),
+    limit: int = Query(
+        5000,
+        ge=1,
+        le=5000,
+        title="Page size",
+        description="Maximum number of messages in response",
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        title="Paging cursor",
+        description="`nextCursor` value from the previous page",
+    ),
     user: User = Depends(get_current_user_authorizer()),
 ) -> MessagesInResponse:
     """An interface for retrieving user's messages.
-    Now able to return last 5000 messages
+    Newest messages go first. Use `nextCursor` from response to get the next page
     """
+    try:
+        cursor_key = paging.decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=strings.MALFORMED_CURSOR,
+        )
+    if settings.fast_json_responses:
+        rows = await messages_repo.get_user_messages_rows(
+            user_id=user.id,
+            sent_included=sent_included,
+            limit=limit + 1,
+            cursor=cursor_key,
+        )
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = paging.encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+        return serialization.FastJSONResponse(
+            {
+                "messages": [serialization.message_row_to_dict(row) for row in rows],
+                "nextCursor": next_cursor,
+            }
+        )
+
     msgs = await messages_repo.get_user_messages(
-        user_id=user.id, sent_included=sent_included
+        user_id=user.id,
+        sent_included=sent_included,
+        limit=limit + 1,
+        cursor=cursor_key,
     )
-    return MessagesInResponse(messages=msgs)
+    next_cursor = None
+    if len(msgs) > limit:
+        msgs = msgs[:limit]
+        next_cursor = paging.encode_cursor(msgs[-1].created_at, msgs[-1].id)
+    return MessagesInResponse(messages=msgs, next_cursor=next_cursor)
+
+
+@router.get(
+    "/export",
+    name="messages:export-messages",
+    response_class=StreamingResponse,
+    summary="Export user's full messages history",
+)
+async def export_messages(
+    messages_repo: MessagesRepository = Depends(get_repository(MessagesRepository)),
+    user: User = Depends(get_current_user_authorizer()),
+) -> StreamingResponse:
+    """Stream all user's messages as NDJSON, oldest first.
+    One message per line in the same shape as a single message
+    """
+    rows = messages_repo.iter_user_messages(user_id=user.id)
+    return StreamingResponse(
+        export.messages_to_ndjson(rows), media_type=export.NDJSON_MEDIA_TYPE
+    )
+
+
+@router.get(
+    "/pending",
+    response_model=MessagesInResponse,
+    name="messages:get-pending-messages",
+    status_code=status.HTTP_200_OK,
+    summary="Wait for messages not acked by device",
+)
+async def get_pending_messages(
+    messages_repo: MessagesRepository = Depends(get_repository(MessagesRepository)),
+    wait: int = Query(
+        0,
+        ge=0,
+        le=60,
+        title="Wait timeout",
+        description="Seconds to wait for a new message when there are no pending",
+    ),
+    limit: int = Query(
+        100,
+        ge=1,
+        le=1000,
+        title="Batch size",
+        description="Maximum number of messages in response",
+    ),
+    user: User = Depends(get_current_user_authorizer()),
+) -> MessagesInResponse:
+    """Long-polling interface for client-side applications.
+    Returns messages that are not marked as **received** or **sent** yet, oldest first.
+    When there are none, waits up to `wait` seconds for a new message
+    """
+    topic = get_user_messages_topic(user_id=user.id, username=user.username)
+    with broadcaster.endpoint.content_waiter(topic) as new_content:
+        rows = await messages_repo.get_user_pending_messages_rows(
+            user_id=user.id, limit=limit
+        )
+        if not rows and wait:
+            try:
+                await asyncio.wait_for(new_content.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                rows = await messages_repo.get_user_pending_messages_rows(
+                    user_id=user.id, limit=limit
+                )
+
+    if settings.fast_json_responses:
+        return serialization.FastJSONResponse(
+            {
+                "messages": [serialization.message_row_to_dict(row) for row in rows],
+                "nextCursor": None,
+            }
+        )
+    return MessagesInResponse(messages=[message_from_row(row) for row in rows])
 
 
 @router.post(
@@ -66,17 +193,53 @@ async def create_message(
     messages_repo: MessagesRepository = Depends(get_repository(MessagesRepository)),
     user: User = Depends(get_current_user_authorizer()),
 ) -> Message:
-    """An interface for retrieving user's messages"""
-    message = await messages_repo.create_message(user=user, message_body=message)
-    await publish_content(
-        endpoint=ws_endpoint,
-        topic=f"messages:/uid-{user.id}/uname-{user.username}",
-        data=message,
+    """An interface for creating message.
+    Message is delivered to subscribers from the outbox right after creation
+    """
+    return await messages_repo.create_message(user=user, message_body=message)
+
+
+@router.post(
+    "/bulk",
+    response_model=MessagesIdsInResponse,
+    name="messages:create-messages-bulk",
+    summary="Create many messages that should be sent out at once",
+)
+async def create_messages_bulk(
+    bulk: MessagesInBulkCreate = Body(...),
+    messages_repo: MessagesRepository = Depends(get_repository(MessagesRepository)),
+    user: User = Depends(get_current_user_authorizer()),
+) -> MessagesIdsInResponse:
+    """An interface for creating campaigns of messages.
+    All messages and their numbers are written in a single transaction
+    """
+    ids = await messages_repo.create_messages_bulk(
+        user=user, messages_bodies=bulk.messages
     )
-    updated_message = await messages_repo.update_status_code(
-        message=message, status_code=120
-    )  # TODO: Refactor to use statuses correctly
-    return updated_message
+    return MessagesIdsInResponse(ids=ids)
+
+
+@router.post(
+    "/status:batch",
+    response_model=MessagesStatusesInResponse,
+    name="messages:update-statuses-batch",
+    summary="Mark many messages as received or sent at once",
+    tags=["Internal"],
+    include_in_schema=settings.debug,
+)
+async def update_statuses_batch(
+    batch: MessagesStatusesInBatchUpdate = Body(...),
+    messages_repo: MessagesRepository = Depends(get_repository(MessagesRepository)),
+    user: User = Depends(get_current_user_authorizer()),
+) -> MessagesStatusesInResponse:
+    """When client-side application (e.g. like mobile app) comes back online
+    it should report all **received** and **sent** messages with a single request.
+    Result is returned for each message in the same order
+    """
+    results = await messages_repo.update_statuses_codes_batch(
+        user_id=user.id, statuses=batch.statuses
+    )
+    return MessagesStatusesInResponse(statuses=results)
 
 
 @router.get(
@@ -92,17 +255,21 @@ async def get_concrete_message(
 ) -> Message:
     """Get concrete message with it's meta info on current moment"""
     try:
-        message = await messages_repo.get_message_by_id(message_id=message_id)
+        message_row = await messages_repo.get_message_row_by_id(message_id=message_id)
     except EntityDoesNotExist:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=strings.MESSAGE_DOES_NOT_EXIST_ERROR,
         )
-    if message.author_id != user.id:  # TODO: Maybe move to services
+    if message_row["author_id"] != user.id:  # TODO: Maybe move to services
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail=strings.NOT_OBJECT_OWNER
         )
-    return message
+    if settings.fast_json_responses:
+        return serialization.FastJSONResponse(
+            serialization.message_row_to_dict(message_row)
+        )
+    return message_from_row(message_row)
 
 
 @router.post(
@@ -122,19 +289,18 @@ async def mark_as_received(
     it should tell about it's **received** this message
     """
     try:
-        message = await messages_repo.get_message_by_id(message_id=message_id)
+        updated_message = await messages_repo.update_status_code(
+            message_id=message_id, user_id=user.id, status_code=130
+        )  # TODO: Refactor to use statuses correctly
     except EntityDoesNotExist:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=strings.MESSAGE_DOES_NOT_EXIST_ERROR,
         )
-    if message.author_id != user.id:  # TODO: Maybe move to services
+    except EntityAccessDenied:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail=strings.NOT_OBJECT_OWNER
         )
-    updated_message = await messages_repo.update_status_code(
-        message=message, status_code=130
-    )  # TODO: Refactor to use statuses correctly
     return updated_message
 
 
@@ -155,17 +321,16 @@ async def mark_as_sent(
     it should tell about it's **sent** this message
     """
     try:
-        message = await messages_repo.get_message_by_id(message_id=message_id)
+        updated_message = await messages_repo.update_status_code(
+            message_id=message_id, user_id=user.id, status_code=140
+        )  # TODO: Refactor to use statuses correctly
     except EntityDoesNotExist:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=strings.MESSAGE_DOES_NOT_EXIST_ERROR,
         )
-    if message.author_id != user.id:  # TODO: Maybe move to services
+    except EntityAccessDenied:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail=strings.NOT_OBJECT_OWNER
         )
-    updated_message = await messages_repo.update_status_code(
-        message=message, status_code=140
-    )  # TODO: Refactor to use statuses correctly
     return updated_message
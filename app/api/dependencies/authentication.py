@@ -82,7 +82,7 @@ async def _get_current_user(
     settings: AppSettings = Depends(get_app_settings),
 ) -> UserWithToken:
     try:
-        username = jwt.get_username_from_token(
+        username, token_meta = jwt.get_token_claims(
             token,
             str(settings.secret_key.get_secret_value()),
         )
@@ -93,7 +93,7 @@ async def _get_current_user(
         )
 
     try:
-        user = await users_repo.get_user_by_username(username=username)
+        user = await users_repo.get_cached_user_by_username(username=username)
         if user.is_active is False:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -101,12 +101,7 @@ async def _get_current_user(
             )
         return UserWithToken(
             **user.dict(),
-            token=JWTToken(
-                token=token,
-                meta=jwt.get_token_meta(
-                    token=token, secret_key=str(settings.secret_key.get_secret_value())
-                ),
-            ),
+            token=JWTToken(token=token, meta=token_meta),
         )
     except EntityDoesNotExist:
         raise HTTPException(
@@ -1,10 +1,13 @@
-from typing import AsyncGenerator, Callable, Type
+from typing import AsyncGenerator, Callable, Optional, Type, Union
 
 from asyncpg.connection import Connection
 from asyncpg.pool import Pool
 from fastapi import Depends
 from starlette.requests import Request
 
+from app.core.config import get_app_settings
+from app.core.settings.app import AppSettings
+from app.db.connection import ConnectionHandle
 from app.db.repositories.base import BaseRepository
 
 
@@ -12,18 +15,28 @@ def _get_db_pool(request: Request) -> Pool:
     return request.app.state.pool
 
 
+def _get_db_read_pool(request: Request) -> Optional[Pool]:
+    return request.app.state.read_pool
+
+
 async def _get_connection_from_pool(
     pool: Pool = Depends(_get_db_pool),
-) -> AsyncGenerator[Connection, None]:
+    read_pool: Optional[Pool] = Depends(_get_db_read_pool),
+    settings: AppSettings = Depends(get_app_settings),
+) -> AsyncGenerator[Union[Connection, ConnectionHandle], None]:
+    if settings.db_lazy_acquire:
+        yield ConnectionHandle(pool, read_pool)
+        return
+
     async with pool.acquire() as conn:
         yield conn
 
 
 def get_repository(
     repo_type: Type[BaseRepository],
-) -> Callable[[Connection], BaseRepository]:
+) -> Callable[[Union[Connection, ConnectionHandle]], BaseRepository]:
     def _get_repo(
-        conn: Connection = Depends(_get_connection_from_pool),
+        conn: Union[Connection, ConnectionHandle] = Depends(_get_connection_from_pool),
     ) -> BaseRepository:
         return repo_type(conn)
 
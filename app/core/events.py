@@ -4,7 +4,13 @@ from fastapi import FastAPI
 from loguru import logger
 
 from app.core.settings.app import AppSettings
-from app.db.events import close_db_connection, connect_to_db
+from app.db.events import (close_db_connection, connect_to_db,
+                           listen_statuses_changes, refresh_statuses_catalog)
+from app.services.broadcasting import get_broadcaster
+from app.services.outbox import get_outbox_dispatcher
+from app.services.phones import get_numbers_normalizer
+from app.services.security import get_password_executor
+from app.services.sockets import get_publisher
 
 
 def create_start_app_handler(
@@ -13,13 +19,32 @@ def create_start_app_handler(
 ) -> Callable:  # type: ignore
     async def start_app() -> None:
         await connect_to_db(app, settings)
+        await refresh_statuses_catalog(app)
+        await listen_statuses_changes(app, settings)
+        await get_broadcaster().connect(app.state.pool)
+        await get_publisher().start()
+        if settings.outbox_dispatch_in_app:
+            await get_outbox_dispatcher().start(app.state.pool)
 
     return start_app
 
 
-def create_stop_app_handler(app: FastAPI) -> Callable:  # type: ignore
+def create_stop_app_handler(
+    app: FastAPI,
+    settings: AppSettings,
+) -> Callable:  # type: ignore
     @logger.catch
     async def stop_app() -> None:
+        if settings.outbox_dispatch_in_app:
+            await get_outbox_dispatcher().stop(
+                timeout=settings.publish_flush_timeout_seconds
+            )
+        await get_publisher().stop(timeout=settings.publish_flush_timeout_seconds)
+        await get_broadcaster().disconnect()
         await close_db_connection(app)
+        get_password_executor().shutdown(wait=False)
+        logger.info(
+            f"Phone numbers cache hit ratio: {get_numbers_normalizer().hit_ratio:.2%}"
+        )
 
     return stop_app
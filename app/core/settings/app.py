@@ -1,14 +1,16 @@
 import logging
 import sys
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from loguru import logger
-from pydantic import PostgresDsn, SecretStr
+from pydantic import PostgresDsn, SecretStr, root_validator
 
 from app.core.logging import InterceptHandler
 from app.core.logging import rotator
-from app.core.settings.base import BaseAppSettings
+from app.core.settings.base import (BaseAppSettings,
+                                    PublishOverflowPolicyTypes,
+                                    PubSubBackendTypes, RetentionPolicyTypes)
 
 
 class AppSettings(BaseAppSettings):
@@ -28,12 +30,53 @@ class AppSettings(BaseAppSettings):
     )
 
     database_url: PostgresDsn
+    database_replica_url: Optional[PostgresDsn] = None
     max_connection_count: int = 50
     min_connection_count: int = 50
+    db_lazy_acquire: bool = True
+    statuses_notify_channel: Optional[str] = None
+    fast_json_responses: bool = False
+
+    message_partitions_ahead: int = 3
+    message_retention_months: int = 12
+    message_retention_policy: RetentionPolicyTypes = RetentionPolicyTypes.detach
+
+    pubsub_backend: PubSubBackendTypes = PubSubBackendTypes.local
+    pubsub_url: Optional[PostgresDsn] = None
+    pubsub_channel: str = "sendy_pubsub"
+    pubsub_health_check_interval_seconds: float = 30.0
+
+    replay_buffer_size: int = 100
+    replay_max_topics: int = 10000
+    replay_db_limit: int = 1000
+
+    publish_queue_size: int = 10000
+    publish_workers: int = 4
+    publish_batch_size: int = 100
+    publish_overflow_policy: PublishOverflowPolicyTypes = (
+        PublishOverflowPolicyTypes.drop_oldest
+    )
+    publish_flush_timeout_seconds: float = 5.0
+
+    outbox_dispatch_in_app: bool = True
+    outbox_workers: int = 2
+    outbox_batch_size: int = 100
+    outbox_poll_interval_seconds: float = 0.2
+    outbox_lease_seconds: float = 30.0
+    outbox_publish_timeout_seconds: float = 5.0
 
     secret_key: SecretStr
 
+    users_cache_size: int = 1024
+    users_cache_ttl_seconds: float = 30.0
+
+    password_hashing_workers: int = 4
+
+    numbers_cache_size: int = 100000
+
     jwt_token_prefix: str = "Token"
+    jwt_cache_size: int = 4096
+    jwt_cache_ttl_seconds: float = 300.0
 
     allowed_hosts: List[str] = ["*"]
 
@@ -49,6 +92,19 @@ class AppSettings(BaseAppSettings):
     class Config:
         validate_assignment = True
 
+    @root_validator(skip_on_failure=True)
+    def warn_about_local_outbox_dispatch(cls, values: Dict[str, Any]) -> Dict[str, Any]:
+        if (
+            values["outbox_dispatch_in_app"]
+            and values["pubsub_backend"] == PubSubBackendTypes.local
+        ):
+            logger.warning(
+                "Outbox is dispatched in app with the local pub/sub backend, "
+                "with more than one app worker messages reach only subscribers "
+                "of the worker which claimed them. Set PUBSUB_BACKEND=postgres"
+            )
+        return values
+
     @property
     def fastapi_kwargs(self) -> Dict[str, Any]:
         return {
@@ -13,6 +13,21 @@ class AppEnvTypes(Enum):
     test: str = "test"
 
 
+class PubSubBackendTypes(Enum):
+    local: str = "local"
+    postgres: str = "postgres"
+
+
+class PublishOverflowPolicyTypes(Enum):
+    drop_oldest: str = "drop_oldest"
+    block: str = "block"
+
+
+class RetentionPolicyTypes(Enum):
+    detach: str = "detach"
+    drop: str = "drop"
+
+
 class BaseAppSettings(BaseSettings):
     app_env: AppEnvTypes = AppEnvTypes.prod
 
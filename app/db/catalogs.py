@@ -0,0 +1,57 @@
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from asyncpg import Record
+
+from app.db.errors import EntityDoesNotExist
+
+
+class StatusesCatalog:
+    """Immutable in-memory index of statuses reference data.
+    Holds rows as they come from `get-all-statuses` query
+    """
+
+    def __init__(self, rows: Iterable[Record]) -> None:
+        by_header_id: Dict[int, List[Record]] = {}
+        for row in rows:
+            by_header_id.setdefault(row["status_header_id"], []).append(row)
+
+        self._by_id = MappingProxyType(
+            {row["id"]: row for rows_ in by_header_id.values() for row in rows_}
+        )
+        self._by_code = MappingProxyType(
+            {row["status_code"]: row for row in self._by_id.values()}
+        )
+        self._by_header_id = MappingProxyType(
+            {
+                header_id: tuple(sorted(rows_, key=lambda row: row["status_code"]))
+                for header_id, rows_ in by_header_id.items()
+            }
+        )
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get_by_id(self, status_id: int) -> Optional[Record]:
+        return self._by_id.get(status_id)
+
+    def get_by_code(self, code: int) -> Record:
+        status = self._by_code.get(code)
+        if status is None:
+            raise EntityDoesNotExist(f"Status with code: {code} does not exist")
+        return status
+
+    def get_by_header_id(self, header_id: int) -> Tuple[Record, ...]:
+        return self._by_header_id.get(header_id, ())
+
+
+_statuses_catalog: Optional[StatusesCatalog] = None
+
+
+def get_statuses_catalog() -> Optional[StatusesCatalog]:
+    return _statuses_catalog
+
+
+def set_statuses_catalog(catalog: StatusesCatalog) -> None:
+    global _statuses_catalog  # noqa: WPS420
+    _statuses_catalog = catalog
@@ -0,0 +1,79 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Set
+
+from asyncpg.connection import Connection
+from asyncpg.pool import Pool
+
+
+class ConnectionHandle:
+    """Lazy replacement for a pool connection held for the whole request.
+    Connection is taken from the pool only for a single query or
+    transaction and released right after it.
+    Works with aiosql queries, because it has pool-like `acquire`/`release`
+    """
+
+    def __init__(self, pool: Pool, read_pool: Optional[Pool] = None) -> None:
+        self._pool = pool
+        self._pinned: Optional[Connection] = None
+        self._wrote = False
+        self.reader = ReadConnectionHandle(self, read_pool)
+
+    @property
+    def is_sticky(self) -> bool:
+        """Whether reads should stay on primary to see own writes"""
+        return self._wrote or self._pinned is not None
+
+    async def acquire(self) -> Connection:
+        self._wrote = True
+        if self._pinned is not None:
+            return self._pinned
+        return await self._pool.acquire()
+
+    async def release(self, conn: Connection) -> None:
+        if conn is not self._pinned:
+            await self._pool.release(conn)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[Connection]:
+        """Pin one connection, so all queries inside go through it"""
+        if self._pinned is not None:
+            async with self._pinned.transaction():
+                yield self._pinned
+            return
+
+        self._wrote = True
+        async with self._pool.acquire() as conn:
+            self._pinned = conn
+            try:
+                async with conn.transaction():
+                    yield conn
+            finally:
+                self._pinned = None
+
+
+class ReadConnectionHandle:
+    """Handle for read-only queries. Takes connections from the read pool
+    (replica) until something went through the primary handle in the same
+    request, after that reads are served by primary to see own writes
+    """
+
+    def __init__(self, primary: ConnectionHandle, pool: Optional[Pool]) -> None:
+        self._primary = primary
+        self._pool = pool
+        self._acquired: Set[int] = set()
+
+    async def acquire(self) -> Connection:
+        if self._pool is None or self._primary.is_sticky:
+            return await self._primary.acquire()
+
+        conn = await self._pool.acquire()
+        self._acquired.add(id(conn))
+        return conn
+
+    async def release(self, conn: Connection) -> None:
+        if id(conn) in self._acquired:
+            self._acquired.discard(id(conn))
+            await self._pool.release(conn)
+            return
+
+        await self._primary.release(conn)
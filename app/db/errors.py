@@ -1,2 +1,10 @@
 class EntityDoesNotExist(Exception):
     """Raised when entity was not found in database."""
+
+
+class EntityAccessDenied(Exception):
+    """Raised when entity belongs to another user."""
+
+
+class EntityRelationsMismatch(Exception):
+    """Raised when not all related entities were linked to the stored one."""
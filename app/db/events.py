@@ -1,8 +1,17 @@
+import asyncio
+from typing import Set
+
 import asyncpg
+from asyncpg.connection import Connection
 from fastapi import FastAPI
 from loguru import logger
 
 from app.core.settings.app import AppSettings
+from app.db.connection import ConnectionHandle
+from app.db.queries.prepared import prepared_queries
+from app.db.repositories.statuses import StatusesRepository
+
+_refresh_tasks: Set[asyncio.Task] = set()
 
 
 async def connect_to_db(app: FastAPI, settings: AppSettings) -> None:
@@ -12,14 +21,58 @@ async def connect_to_db(app: FastAPI, settings: AppSettings) -> None:
         str(settings.database_url),
         min_size=settings.min_connection_count,
         max_size=settings.max_connection_count,
+        init=prepared_queries.init_connection,
     )
 
+    app.state.read_pool = None
+    if settings.database_replica_url:
+        app.state.read_pool = await asyncpg.create_pool(
+            str(settings.database_replica_url),
+            min_size=settings.min_connection_count,
+            max_size=settings.max_connection_count,
+            init=prepared_queries.init_connection,
+        )
+
     logger.info("Connection established")
 
 
+async def refresh_statuses_catalog(app: FastAPI) -> None:
+    logger.info("Loading statuses catalog")
+
+    catalog = await StatusesRepository(
+        ConnectionHandle(app.state.pool)
+    ).refresh_catalog()
+
+    logger.info(f"Statuses catalog loaded with {len(catalog)} statuses")
+
+
+async def listen_statuses_changes(app: FastAPI, settings: AppSettings) -> None:
+    """Refresh statuses catalog on NOTIFY to the configured channel"""
+    app.state.statuses_listener = None
+    if not settings.statuses_notify_channel:
+        return
+
+    def on_notification(conn: Connection, pid: int, channel: str, payload: str) -> None:
+        task = asyncio.create_task(refresh_statuses_catalog(app))
+        _refresh_tasks.add(task)
+        task.add_done_callback(_refresh_tasks.discard)
+
+    conn = await asyncpg.connect(str(settings.database_url))
+    await conn.add_listener(settings.statuses_notify_channel, on_notification)
+    app.state.statuses_listener = conn
+
+    logger.info(
+        f"Listening to statuses changes on `{settings.statuses_notify_channel}`"
+    )
+
+
 async def close_db_connection(app: FastAPI) -> None:
     logger.info("Closing connection to database")
 
+    if getattr(app.state, "statuses_listener", None) is not None:
+        await app.state.statuses_listener.close()
     await app.state.pool.close()
+    if getattr(app.state, "read_pool", None) is not None:
+        await app.state.read_pool.close()
 
-    logger.info("Connection closed")
+    logger.info(f"Connection closed, hot queries runs: {prepared_queries.stats}")
@@ -0,0 +1,49 @@
+"""Database migrations CLI.
+
+Usage:
+    python -m app.db.migrations upgrade
+    python -m app.db.migrations status
+"""
+import argparse
+import asyncio
+
+import asyncpg
+
+from app.core.config import get_app_settings
+from app.db.migrations.runner import (apply_migrations, get_applied_versions,
+                                      get_migrations)
+
+
+async def upgrade() -> None:
+    conn = await asyncpg.connect(str(get_app_settings().database_url))
+    try:
+        applied = await apply_migrations(conn)
+    finally:
+        await conn.close()
+    if applied:
+        for migration in applied:
+            print(f"Applied {migration.version}")
+    else:
+        print("Database is up to date")
+
+
+async def status() -> None:
+    conn = await asyncpg.connect(str(get_app_settings().database_url))
+    try:
+        applied = await get_applied_versions(conn)
+    finally:
+        await conn.close()
+    for migration in get_migrations():
+        mark = "applied" if migration.version in applied else "pending"
+        print(f"{migration.version}: {mark}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.db.migrations")
+    parser.add_argument("command", choices=["upgrade", "status"])
+    args = parser.parse_args()
+    asyncio.run(upgrade() if args.command == "upgrade" else status())
+
+
+if __name__ == "__main__":
+    main()
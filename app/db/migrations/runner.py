@@ -0,0 +1,60 @@
+import pathlib
+from dataclasses import dataclass
+from typing import List, Set
+
+from asyncpg.connection import Connection
+from loguru import logger
+
+MIGRATIONS_DIR = pathlib.Path(__file__).parent / "sql"
+
+CREATE_MIGRATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS "public"."schemaMigrations" (
+    version    text PRIMARY KEY,
+    applied_at timestamp NOT NULL DEFAULT now()
+)
+"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: str
+    path: pathlib.Path
+
+    @property
+    def sql(self) -> str:
+        return self.path.read_text()
+
+
+def get_migrations() -> List[Migration]:
+    """All migrations shipped with the app, ordered by version"""
+    return [
+        Migration(version=path.stem, path=path)
+        for path in sorted(MIGRATIONS_DIR.glob("*.sql"))
+    ]
+
+
+async def get_applied_versions(conn: Connection) -> Set[str]:
+    await conn.execute(CREATE_MIGRATIONS_TABLE)
+    rows = await conn.fetch('SELECT version FROM "public"."schemaMigrations"')
+    return {row["version"] for row in rows}
+
+
+async def get_pending_migrations(conn: Connection) -> List[Migration]:
+    applied = await get_applied_versions(conn)
+    return [
+        migration for migration in get_migrations() if migration.version not in applied
+    ]
+
+
+async def apply_migrations(conn: Connection) -> List[Migration]:
+    """Apply pending migrations, each one in its own transaction"""
+    pending = await get_pending_migrations(conn)
+    for migration in pending:
+        logger.info(f"Applying migration {migration.version}")
+        async with conn.transaction():
+            await conn.execute(migration.sql)
+            await conn.execute(
+                'INSERT INTO "public"."schemaMigrations" (version) VALUES ($1)',
+                migration.version,
+            )
+    return pending
@@ -0,0 +1,58 @@
+-- Base schema the queries in app/db/queries/sql rely on.
+-- Uses IF NOT EXISTS, so it's safe to apply on databases created by hand.
+
+CREATE TABLE IF NOT EXISTS "public"."user" (
+    id              serial PRIMARY KEY,
+    username        varchar(16) NOT NULL,
+    email           varchar(64) NOT NULL,
+    salt            text NOT NULL,
+    hashed_password text NOT NULL,
+    is_active       boolean NOT NULL DEFAULT false,
+    created_at      timestamp NOT NULL DEFAULT now(),
+    updated_at      timestamp NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS "public"."statusHeader" (
+    id          integer PRIMARY KEY,
+    name        text NOT NULL,
+    description text NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS "public"."status" (
+    id               serial PRIMARY KEY,
+    code             integer NOT NULL UNIQUE,
+    name             text NOT NULL,
+    description      text NOT NULL,
+    status_header_id integer NOT NULL REFERENCES "public"."statusHeader" (id)
+);
+
+CREATE TABLE IF NOT EXISTS "public"."message" (
+    id          serial PRIMARY KEY,
+    content     text NOT NULL,
+    user_id     integer NOT NULL REFERENCES "public"."user" (id),
+    status_code integer NOT NULL REFERENCES "public"."status" (code),
+    created_at  timestamp NOT NULL DEFAULT now(),
+    updated_at  timestamp NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS "public"."messageNumbers" (
+    id         serial PRIMARY KEY,
+    number     varchar(32) NOT NULL,
+    message_id integer NOT NULL REFERENCES "public"."message" (id) ON DELETE CASCADE
+);
+
+INSERT INTO "public"."statusHeader" (id, name, description)
+SELECT 100, 'message', 'Message delivery statuses'
+WHERE NOT EXISTS (SELECT 1 FROM "public"."statusHeader" WHERE id = 100);
+
+INSERT INTO "public"."status" (code, name, description, status_header_id)
+SELECT seed.code, seed.name, seed.description, 100
+FROM (
+    VALUES (110, 'created', 'Message is created and waits to be delivered to devices'),
+           (120, 'pushed', 'Message is pushed to subscribed devices'),
+           (130, 'received', 'Message is received by device'),
+           (140, 'sent', 'Message is sent out by device')
+) AS seed(code, name, description)
+WHERE NOT EXISTS (
+    SELECT 1 FROM "public"."status" status WHERE status.code = seed.code
+);
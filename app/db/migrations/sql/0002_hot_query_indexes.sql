@@ -0,0 +1,27 @@
+-- Indexes for lookups done by app/db/queries/sql/*.sql
+
+CREATE UNIQUE INDEX IF NOT EXISTS user_email_key
+    ON "public"."user" (email);
+
+CREATE UNIQUE INDEX IF NOT EXISTS user_username_key
+    ON "public"."user" (username);
+
+-- Databases created before migrations may miss the constraint from 0001
+CREATE UNIQUE INDEX IF NOT EXISTS status_code_key
+    ON "public"."status" (code);
+
+CREATE INDEX IF NOT EXISTS message_numbers_message_id_idx
+    ON "public"."messageNumbers" (message_id) INCLUDE (number);
+
+-- Keyset pages of get-user-messages with sent messages included
+CREATE INDEX IF NOT EXISTS message_user_id_created_at_idx
+    ON "public"."message" (user_id, created_at DESC, id DESC) INCLUDE (status_code);
+
+-- Default get-user-messages pages, sent messages (code 140) excluded
+CREATE INDEX IF NOT EXISTS message_user_id_created_at_not_sent_idx
+    ON "public"."message" (user_id, created_at DESC, id DESC)
+    WHERE status_code <= 130;
+
+-- Replay of missed messages by ID
+CREATE INDEX IF NOT EXISTS message_user_id_id_idx
+    ON "public"."message" (user_id, id);
@@ -0,0 +1,30 @@
+-- Every distinct number is stored once in "recipient", messages reference
+-- recipients through a compact join table ordered by number position.
+
+CREATE TABLE IF NOT EXISTS "public"."recipient" (
+    id     serial PRIMARY KEY,
+    number varchar(32) NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS "public"."messageRecipients" (
+    message_id   integer NOT NULL REFERENCES "public"."message" (id) ON DELETE CASCADE,
+    position     smallint NOT NULL,
+    recipient_id integer NOT NULL REFERENCES "public"."recipient" (id),
+    PRIMARY KEY (message_id, position)
+);
+
+INSERT INTO "public"."recipient" (number)
+SELECT DISTINCT nums.number
+FROM "public"."messageNumbers" nums
+ORDER BY nums.number
+ON CONFLICT (number) DO NOTHING;
+
+INSERT INTO "public"."messageRecipients" (message_id, position, recipient_id)
+SELECT nums.message_id,
+       row_number() OVER (PARTITION BY nums.message_id ORDER BY nums.id),
+       recipient.id
+FROM "public"."messageNumbers" nums
+    INNER JOIN "public"."recipient" recipient ON recipient.number = nums.number
+ON CONFLICT (message_id, position) DO NOTHING;
+
+DROP TABLE "public"."messageNumbers";
@@ -0,0 +1,72 @@
+-- Monthly range partitions of "message" on created_at, named message_pYYYYMM.
+-- New partitions are created ahead and old ones expired by
+-- `python -m app.db.partitions maintain`, the default partition only catches
+-- rows when that job wasn't run in time.
+--
+-- Primary key of a partitioned table has to include the partition key, so
+-- "messageRecipients" can't reference "message" with a foreign key anymore.
+
+ALTER TABLE "public"."messageRecipients"
+    DROP CONSTRAINT IF EXISTS "messageRecipients_message_id_fkey";
+
+ALTER TABLE "public"."message" RENAME TO "messageUnpartitioned";
+ALTER INDEX "public"."message_pkey" RENAME TO "messageUnpartitioned_pkey";
+
+CREATE TABLE "public"."message" (
+    id          integer NOT NULL DEFAULT nextval('"public"."message_id_seq"'),
+    content     text NOT NULL,
+    user_id     integer NOT NULL REFERENCES "public"."user" (id),
+    status_code integer NOT NULL REFERENCES "public"."status" (code),
+    created_at  timestamp NOT NULL DEFAULT now(),
+    updated_at  timestamp NOT NULL DEFAULT now(),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE "public"."message_default"
+    PARTITION OF "public"."message" DEFAULT;
+
+DO $$
+DECLARE
+    month date;
+BEGIN
+    FOR month IN
+        SELECT generate_series(
+            date_trunc(
+                'month',
+                COALESCE(
+                    (SELECT min(created_at) FROM "public"."messageUnpartitioned"),
+                    now()
+                )
+            ),
+            date_trunc('month', now()) + interval '3 months',
+            interval '1 month'
+        )::date
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE "public".%I PARTITION OF "public"."message" '
+            'FOR VALUES FROM (%L) TO (%L)',
+            'message_p' || to_char(month, 'YYYYMM'),
+            month,
+            (month + interval '1 month')::date
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO "public"."message" (id, content, user_id, status_code, created_at, updated_at)
+SELECT id, content, user_id, status_code, created_at, updated_at
+FROM "public"."messageUnpartitioned";
+
+ALTER SEQUENCE "public"."message_id_seq" OWNED BY "public"."message".id;
+
+DROP TABLE "public"."messageUnpartitioned";
+
+-- Same indexes as in 0002, created on every partition
+CREATE INDEX message_user_id_created_at_idx
+    ON "public"."message" (user_id, created_at DESC, id DESC) INCLUDE (status_code);
+
+CREATE INDEX message_user_id_created_at_not_sent_idx
+    ON "public"."message" (user_id, created_at DESC, id DESC)
+    WHERE status_code <= 130;
+
+CREATE INDEX message_user_id_id_idx
+    ON "public"."message" (user_id, id);
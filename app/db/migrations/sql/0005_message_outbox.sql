@@ -0,0 +1,11 @@
+-- Transactional outbox: every created message gets a row here in the same
+-- statement, dispatcher workers claim rows with FOR UPDATE SKIP LOCKED,
+-- publish messages to subscribers and delete the rows.
+
+CREATE TABLE IF NOT EXISTS "public"."messageOutbox" (
+    id                 bigserial PRIMARY KEY,
+    message_id         integer NOT NULL,
+    message_created_at timestamp NOT NULL,
+    topic              text NOT NULL,
+    created_at         timestamp NOT NULL DEFAULT now()
+);
@@ -0,0 +1,4 @@
+-- get-user-pending-messages, messages not acked by device (code < 130)
+CREATE INDEX IF NOT EXISTS message_user_id_id_pending_idx
+    ON "public"."message" (user_id, id)
+    WHERE status_code < 130;
@@ -0,0 +1,6 @@
+-- Dispatchers lease claimed outbox rows instead of holding row locks while
+-- messages are published, rows which weren't delivered are claimed again
+-- once their lease expires.
+
+ALTER TABLE "public"."messageOutbox"
+    ADD COLUMN IF NOT EXISTS claimed_until timestamp;
@@ -0,0 +1,55 @@
+-- Monthly range partitions of "messageRecipients" on the created_at of their
+-- message, named messageRecipients_pYYYYMM. Partitions follow the ones of
+-- "message" and are created, detached and dropped together with them by
+-- `python -m app.db.partitions maintain`, so retention never deletes
+-- recipients links row by row.
+--
+-- The partition key has to be part of the primary key, lookups pass both
+-- message_id and message_created_at, so only one partition is scanned.
+
+ALTER TABLE "public"."messageRecipients" RENAME TO "messageRecipientsUnpartitioned";
+ALTER INDEX "public"."messageRecipients_pkey" RENAME TO "messageRecipientsUnpartitioned_pkey";
+ALTER TABLE "public"."messageRecipientsUnpartitioned"
+    RENAME CONSTRAINT "messageRecipients_recipient_id_fkey"
+    TO "messageRecipientsUnpartitioned_recipient_id_fkey";
+
+CREATE TABLE "public"."messageRecipients" (
+    message_id         integer NOT NULL,
+    message_created_at timestamp NOT NULL,
+    position           smallint NOT NULL,
+    recipient_id       integer NOT NULL,
+    PRIMARY KEY (message_id, message_created_at, position),
+    CONSTRAINT "messageRecipients_recipient_id_fkey"
+        FOREIGN KEY (recipient_id) REFERENCES "public"."recipient" (id)
+) PARTITION BY RANGE (message_created_at);
+
+CREATE TABLE "public"."messageRecipients_default"
+    PARTITION OF "public"."messageRecipients" DEFAULT;
+
+DO $$
+DECLARE
+    month date;
+BEGIN
+    FOR month IN
+        SELECT to_date(substring(child.relname FROM '^message_p(\d{6})$'), 'YYYYMM')
+        FROM pg_inherits inh
+            INNER JOIN pg_class child ON child.oid = inh.inhrelid
+        WHERE inh.inhparent = '"public"."message"'::regclass
+          AND child.relname ~ '^message_p\d{6}$'
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE "public".%I PARTITION OF "public"."messageRecipients" '
+            'FOR VALUES FROM (%L) TO (%L)',
+            'messageRecipients_p' || to_char(month, 'YYYYMM'),
+            month,
+            (month + interval '1 month')::date
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO "public"."messageRecipients" (message_id, message_created_at, position, recipient_id)
+SELECT msg_rcpt.message_id, msg.created_at, msg_rcpt.position, msg_rcpt.recipient_id
+FROM "public"."messageRecipientsUnpartitioned" msg_rcpt
+    INNER JOIN "public"."message" msg ON msg.id = msg_rcpt.message_id;
+
+DROP TABLE "public"."messageRecipientsUnpartitioned";
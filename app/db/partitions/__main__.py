@@ -0,0 +1,61 @@
+"""Messages partitions maintenance CLI.
+
+Usage:
+    python -m app.db.partitions maintain
+    python -m app.db.partitions status
+"""
+import argparse
+import asyncio
+import datetime
+
+import asyncpg
+
+from app.core.config import get_app_settings
+from app.db.partitions.manager import (create_partitions, expire_partitions,
+                                       get_partition_name,
+                                       get_partitions_months)
+
+
+async def maintain() -> None:
+    settings = get_app_settings()
+    today = datetime.date.today()
+    conn = await asyncpg.connect(str(settings.database_url))
+    try:
+        created = await create_partitions(
+            conn, today=today, months_ahead=settings.message_partitions_ahead
+        )
+        expired = await expire_partitions(
+            conn,
+            today=today,
+            keep_months=settings.message_retention_months,
+            policy=settings.message_retention_policy,
+        )
+    finally:
+        await conn.close()
+    for name in created:
+        print(f"Created {name}")
+    for name in expired:
+        print(f"Expired {name} ({settings.message_retention_policy.value})")
+    if not created and not expired:
+        print("Partitions are up to date")
+
+
+async def status() -> None:
+    conn = await asyncpg.connect(str(get_app_settings().database_url))
+    try:
+        months = await get_partitions_months(conn)
+    finally:
+        await conn.close()
+    for month in months:
+        print(get_partition_name(month))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.db.partitions")
+    parser.add_argument("command", choices=["maintain", "status"])
+    args = parser.parse_args()
+    asyncio.run(maintain() if args.command == "maintain" else status())
+
+
+if __name__ == "__main__":
+    main()
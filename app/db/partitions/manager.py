@@ -0,0 +1,197 @@
+import datetime
+import re
+from typing import List
+
+import asyncpg
+from asyncpg.connection import Connection
+from loguru import logger
+
+from app.core.settings.base import RetentionPolicyTypes
+
+PARTITION_NAME_RE = re.compile(r"^message_p(\d{4})(\d{2})$")
+
+# Partitioned tables with their partition keys, recipients links are
+# partitioned by the month of their message and follow its partitions
+PARTITIONED_TABLES = {
+    "message": "created_at",
+    "messageRecipients": "message_created_at",
+}
+
+GET_PARTITIONS = """
+SELECT child.relname
+FROM pg_inherits inh
+    INNER JOIN pg_class child ON child.oid = inh.inhrelid
+WHERE inh.inhparent = '"public"."message"'::regclass
+"""
+
+CREATE_PARTITION = """
+CREATE TABLE IF NOT EXISTS "public"."{name}"
+    PARTITION OF "public"."{table}" FOR VALUES FROM ('{start}') TO ('{end}')
+"""
+
+GET_DEFAULT_PARTITION_MONTHS = """
+SELECT DISTINCT date_trunc('month', msg.created_at)::date as month
+FROM "public"."message_default" msg
+UNION
+SELECT DISTINCT date_trunc('month', msg_rcpt.message_created_at)::date as month
+FROM "public"."messageRecipients_default" msg_rcpt
+"""
+
+DEFAULT_PARTITION_HAS_ROWS = """
+SELECT EXISTS (
+    SELECT 1
+    FROM "public"."{table}_default"
+    WHERE {key} >= $1 AND {key} < $2
+)
+"""
+
+DETACH_DEFAULT_PARTITION = """
+ALTER TABLE "public"."{table}" DETACH PARTITION "public"."{table}_default"
+"""
+
+ATTACH_DEFAULT_PARTITION = """
+ALTER TABLE "public"."{table}" ATTACH PARTITION "public"."{table}_default" DEFAULT
+"""
+
+# Default partitions are created with PARTITION OF, so their columns are
+# in the same order as columns of the partitioned table
+MOVE_DEFAULT_PARTITION_ROWS = """
+WITH moved AS (
+    DELETE FROM "public"."{table}_default"
+    WHERE {key} >= $1 AND {key} < $2
+    RETURNING *
+)
+INSERT INTO "public"."{table}"
+SELECT * FROM moved
+"""
+
+DETACH_PARTITION = """
+ALTER TABLE "public"."{table}" DETACH PARTITION "public"."{name}"
+"""
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def get_partition_name(month: datetime.date, table: str = "message") -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+async def get_partitions_months(conn: Connection) -> List[datetime.date]:
+    """Months of existing monthly partitions, default one is skipped"""
+    months = []
+    for row in await conn.fetch(GET_PARTITIONS):
+        match = PARTITION_NAME_RE.match(row["relname"])
+        if match:
+            months.append(datetime.date(int(match[1]), int(match[2]), 1))
+    return sorted(months)
+
+
+async def create_partitions(
+    conn: Connection, *, today: datetime.date, months_ahead: int
+) -> List[str]:
+    """Make sure partitions exist from current month up to `months_ahead`
+    and for every month with rows caught by the default partition.
+    Failed months are logged and skipped, so the rest is still maintained
+    """
+    existing = set(await get_partitions_months(conn))
+    current = today.replace(day=1)
+    months = {add_months(current, offset) for offset in range(months_ahead + 1)}
+    months.update(
+        row["month"] for row in await conn.fetch(GET_DEFAULT_PARTITION_MONTHS)
+    )
+    created = []
+    for month in sorted(months - existing):
+        name = get_partition_name(month)
+        logger.info(f"Creating partition {name}")
+        try:
+            async with conn.transaction():
+                await _create_partition(conn, month)
+        except asyncpg.PostgresError as exc:
+            logger.exception(f"Failed to create partition {name}: {exc}")
+            continue
+        created.append(name)
+    return created
+
+
+async def _create_partition(conn: Connection, month: datetime.date) -> None:
+    """Create partitions of the month for all partitioned tables.
+    Should be called inside a transaction
+    """
+    for table, key in PARTITIONED_TABLES.items():
+        await _create_table_partition(conn, table, key, month)
+
+
+async def _create_table_partition(
+    conn: Connection, table: str, key: str, month: datetime.date
+) -> None:
+    """Rows of the month already caught by the default partition would make
+    the new partition conflict with it, so they're moved with default one
+    detached.
+
+    Detaching takes ACCESS EXCLUSIVE lock on the partitioned table until
+    the transaction ends, so all reads and writes of the table wait while
+    rows are moved. Default partitions only catch rows when maintenance
+    wasn't run in time, run it regularly to keep them empty
+    """
+    end = add_months(month, 1)
+    create_sql = CREATE_PARTITION.format(
+        name=get_partition_name(month, table), table=table, start=month, end=end
+    )
+    has_rows_sql = DEFAULT_PARTITION_HAS_ROWS.format(table=table, key=key)
+    if not await conn.fetchval(has_rows_sql, month, end):
+        await conn.execute(create_sql)
+        return
+
+    logger.info(f"Moving {month:%Y-%m} rows out of {table} default partition")
+    await conn.execute(DETACH_DEFAULT_PARTITION.format(table=table))
+    await conn.execute(create_sql)
+    await conn.execute(
+        MOVE_DEFAULT_PARTITION_ROWS.format(table=table, key=key), month, end
+    )
+    await conn.execute(ATTACH_DEFAULT_PARTITION.format(table=table))
+
+
+async def expire_partitions(
+    conn: Connection,
+    *,
+    today: datetime.date,
+    keep_months: int,
+    policy: RetentionPolicyTypes,
+) -> List[str]:
+    """Detach or drop partitions older than `keep_months` full months.
+    Recipients links partitions are detached or dropped together with
+    messages ones. Failed months are logged and skipped
+    """
+    oldest_kept = add_months(today.replace(day=1), -keep_months)
+    expired = []
+    for month in await get_partitions_months(conn):
+        if month >= oldest_kept:
+            break
+        name = get_partition_name(month)
+        try:
+            async with conn.transaction():
+                for table in PARTITIONED_TABLES:
+                    await _expire_table_partition(conn, table, month, policy)
+        except asyncpg.PostgresError as exc:
+            logger.exception(f"Failed to expire partition {name}: {exc}")
+            continue
+        expired.append(name)
+    return expired
+
+
+async def _expire_table_partition(
+    conn: Connection,
+    table: str,
+    month: datetime.date,
+    policy: RetentionPolicyTypes,
+) -> None:
+    name = get_partition_name(month, table)
+    if policy == RetentionPolicyTypes.drop:
+        logger.info(f"Dropping partition {name}")
+        await conn.execute(f'DROP TABLE "public"."{name}"')
+    else:
+        logger.info(f"Detaching partition {name}")
+        await conn.execute(DETACH_PARTITION.format(table=table, name=name))
@@ -0,0 +1,268 @@
+import datetime
+from typing import Any, Dict, List, Optional, Set, Union
+
+import asyncpg
+from aiosql.queries import Queries
+from asyncpg import Record
+from asyncpg.connection import Connection
+from loguru import logger
+
+from app.db.connection import ConnectionHandle, ReadConnectionHandle
+from app.db.queries.queries import queries
+
+AnyConnection = Union[Connection, ConnectionHandle, ReadConnectionHandle]
+
+HOT_QUERIES = (
+    "get_user_by_username",
+    "get_user_by_email",
+    "get_message_by_id",
+    "get_user_messages",
+    "get_user_messages_after_cursor",
+    "get_user_messages_with_sent",
+    "get_user_messages_with_sent_after_cursor",
+    "create_message",
+    "update_status_code",
+)
+
+
+class PreparedStatementsRegistry:
+    """Hot aiosql queries prepared once per pool connection.
+    `init_connection` is used as pool `init` hook, queries ran on a connection
+    which wasn't initialized (or was reconnected) are prepared lazily.
+
+    Statements are kept in asyncpg statement cache of the connection:
+    `PreparedStatement` objects are invalidated when their connection
+    is released to the pool, cached statements are not.
+
+    `stats` is bookkeeping of this registry: `warm_runs` counts queries ran
+    on a connection where the registry already warmed up or ran them,
+    `cold_runs` the first runs. Those aren't asyncpg statement cache hits
+    and misses, statements evicted from the cache still count as warm
+    """
+
+    def __init__(self, aiosql_queries: Queries, names: tuple) -> None:
+        self._queries = aiosql_queries
+        self._names = names
+        self._prepared: Dict[int, Set[str]] = {}
+        self.warm_runs = 0
+        self.cold_runs = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "warm_runs": self.warm_runs,
+            "cold_runs": self.cold_runs,
+            "connections": len(self._prepared),
+        }
+
+    async def init_connection(self, conn: Connection) -> None:
+        if not _CAN_WARM_STATEMENT_CACHE:
+            return
+        prepared = self._get_connection_prepared(conn)
+        for name in self._names:
+            await _warm_statement_cache(conn, self._get_sql(name))
+            prepared.add(name)
+
+    async def fetch(
+        self, conn: AnyConnection, name: str, **params: Any
+    ) -> List[Record]:
+        async with _acquire(conn) as connection:
+            self._count(connection, name)
+            return await connection.fetch(
+                self._get_sql(name), *self._order_params(name, params)
+            )
+
+    async def fetchrow(
+        self, conn: AnyConnection, name: str, **params: Any
+    ) -> Optional[Record]:
+        async with _acquire(conn) as connection:
+            self._count(connection, name)
+            return await connection.fetchrow(
+                self._get_sql(name), *self._order_params(name, params)
+            )
+
+    def _count(self, conn: Connection, name: str) -> None:
+        prepared = self._get_connection_prepared(conn)
+        if name in prepared:
+            self.warm_runs += 1
+        else:
+            self.cold_runs += 1
+            prepared.add(name)
+
+    def _get_connection_prepared(self, conn: Connection) -> Set[str]:
+        key = _connection_key(conn)
+        prepared = self._prepared.get(key)
+        if prepared is None:
+            prepared = self._prepared[key] = set()
+            # Connection settings aren't available anymore when termination
+            # listeners are called, so the key is captured here
+            conn.add_termination_listener(lambda _: self._prepared.pop(key, None))
+        return prepared
+
+    def _get_sql(self, name: str) -> str:
+        return getattr(self._queries, name).sql
+
+    def _order_params(self, name: str, params: Dict[str, Any]) -> List[Any]:
+        return self._queries.driver_adapter.maybe_order_params(name, params)
+
+
+# `Connection._prepare` is private, it's used only on asyncpg versions
+# it's known to work with, otherwise statements are prepared on first run
+_PRIVATE_PREPARE_VERSIONS = ((0, 27), (0, 32))
+
+
+def _supports_private_prepare(version: str) -> bool:
+    major, minor = (int(part) for part in version.split(".")[:2])
+    first, last = _PRIVATE_PREPARE_VERSIONS
+    return first <= (major, minor) <= last
+
+
+_CAN_WARM_STATEMENT_CACHE = _supports_private_prepare(asyncpg.__version__)
+if not _CAN_WARM_STATEMENT_CACHE:
+    logger.warning(
+        f"Hot queries aren't prepared ahead with asyncpg {asyncpg.__version__}, "
+        "they are prepared on first run"
+    )
+
+
+async def _warm_statement_cache(conn: Connection, sql: str) -> None:
+    """Put statement into asyncpg statement cache without running it,
+    same call `fetch` makes on cache miss
+    """
+    await conn._prepare(sql, use_cache=True)
+
+
+def _connection_key(conn: Connection) -> int:
+    # Backend pids may collide between primary and replica servers, settings
+    # object lives exactly as long as the underlying connection
+    return id(conn.get_settings())
+
+
+class _acquire:
+    """Same as aiosql `MaybeAcquire`: take connection from pool-like object
+    only for the duration of the statement
+    """
+
+    def __init__(self, conn: AnyConnection) -> None:
+        self._conn = conn
+        self._acquired: Optional[Connection] = None
+
+    async def __aenter__(self) -> Connection:
+        if isinstance(self._conn, (ConnectionHandle, ReadConnectionHandle)):
+            self._acquired = await self._conn.acquire()
+            return self._acquired
+        return self._conn
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        if self._acquired is not None:
+            await self._conn.release(self._acquired)
+
+
+class PreparedQueries(PreparedStatementsRegistry):
+    async def get_user_by_username(
+        self, conn: AnyConnection, *, username: str
+    ) -> Optional[Record]:
+        return await self.fetchrow(conn, "get_user_by_username", username=username)
+
+    async def get_user_by_email(
+        self, conn: AnyConnection, *, email: str
+    ) -> Optional[Record]:
+        return await self.fetchrow(conn, "get_user_by_email", email=email)
+
+    async def get_message_by_id(
+        self, conn: AnyConnection, *, message_id: int
+    ) -> Optional[Record]:
+        return await self.fetchrow(conn, "get_message_by_id", message_id=message_id)
+
+    async def get_user_messages(
+        self, conn: AnyConnection, *, user_id: int, limit: int
+    ) -> List[Record]:
+        return await self.fetch(conn, "get_user_messages", user_id=user_id, limit=limit)
+
+    async def get_user_messages_after_cursor(
+        self,
+        conn: AnyConnection,
+        *,
+        user_id: int,
+        cursor_created_at: datetime.datetime,
+        cursor_id: int,
+        limit: int,
+    ) -> List[Record]:
+        return await self.fetch(
+            conn,
+            "get_user_messages_after_cursor",
+            user_id=user_id,
+            cursor_created_at=cursor_created_at,
+            cursor_id=cursor_id,
+            limit=limit,
+        )
+
+    async def get_user_messages_with_sent(
+        self, conn: AnyConnection, *, user_id: int, limit: int
+    ) -> List[Record]:
+        return await self.fetch(
+            conn, "get_user_messages_with_sent", user_id=user_id, limit=limit
+        )
+
+    async def get_user_messages_with_sent_after_cursor(
+        self,
+        conn: AnyConnection,
+        *,
+        user_id: int,
+        cursor_created_at: datetime.datetime,
+        cursor_id: int,
+        limit: int,
+    ) -> List[Record]:
+        return await self.fetch(
+            conn,
+            "get_user_messages_with_sent_after_cursor",
+            user_id=user_id,
+            cursor_created_at=cursor_created_at,
+            cursor_id=cursor_id,
+            limit=limit,
+        )
+
+    async def create_message(
+        self,
+        conn: AnyConnection,
+        *,
+        content: str,
+        user_id: int,
+        status_code: int,
+        created_at: datetime.datetime,
+        updated_at: datetime.datetime,
+        numbers: List[str],
+        topic: str,
+    ) -> Optional[Record]:
+        return await self.fetchrow(
+            conn,
+            "create_message",
+            content=content,
+            user_id=user_id,
+            status_code=status_code,
+            created_at=created_at,
+            updated_at=updated_at,
+            numbers=numbers,
+            topic=topic,
+        )
+
+    async def update_status_code(
+        self,
+        conn: AnyConnection,
+        *,
+        message_id: int,
+        user_id: int,
+        status_code: int,
+        updated_at: datetime.datetime,
+    ) -> Optional[Record]:
+        return await self.fetchrow(
+            conn,
+            "update_status_code",
+            message_id=message_id,
+            user_id=user_id,
+            status_code=status_code,
+            updated_at=updated_at,
+        )
+
+
+prepared_queries = PreparedQueries(queries, HOT_QUERIES)
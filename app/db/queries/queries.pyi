@@ -1,8 +1,9 @@
 """Typings for queries generated by aiosql"""
 import datetime
-from typing import Dict, List, Literal
+from typing import AsyncContextManager, Dict, List, Literal
 
 from asyncpg import Connection, Record
+from asyncpg.cursor import CursorIterator
 
 class UsersQueriesMixin:
     async def get_user_by_email(self, conn: Connection, *, email: str) -> Record: ...
@@ -23,6 +24,7 @@ class UsersQueriesMixin:
     ) -> Record: ...
 
 class StatusesQueriesMixin:
+    async def get_all_statuses(self, conn: Connection) -> List[Record]: ...
     async def get_status_by_id(self, conn: Connection, *, status_id: int) -> Record: ...
     async def get_statuses_by_header_id(
         self, conn: Connection, *, header_id: int
@@ -32,9 +34,21 @@ class MessagesQueriesMixin:
     async def get_message_by_id(
         self, conn: Connection, *, message_id: int
     ) -> Record: ...
+    async def get_user_messages_after_id(
+        self, conn: Connection, *, user_id: int, message_id: int, limit: int
+    ) -> List[Record]: ...
+    async def get_user_pending_messages(
+        self, conn: Connection, *, user_id: int, limit: int
+    ) -> List[Record]: ...
+    def export_user_messages_cursor(
+        self, conn: Connection, *, user_id: int
+    ) -> AsyncContextManager[CursorIterator]: ...
     async def get_message_numbers(
         self, conn: Connection, *, message_id: int
     ) -> Record: ...
+    async def upsert_recipients(
+        self, conn: Connection, *, numbers: List[str]
+    ) -> None: ...
     async def create_message(
         self,
         conn: Connection,
@@ -44,12 +58,15 @@ class MessagesQueriesMixin:
         status_code: int,
         created_at: datetime.datetime,
         updated_at: datetime.datetime,
+        numbers: List[str],
+        topic: str,
     ) -> Record: ...
     async def update_status_code(
         self,
         conn: Connection,
         *,
         message_id: int,
+        user_id: int,
         status_code: int,
         updated_at: datetime.datetime,
     ) -> Record: ...
@@ -59,21 +76,73 @@ class MessagesQueriesMixin:
     async def get_lookup_messages_by_author_id(
         self, conn: Connection, *, id: int, lookup: str
     ) -> Record: ...
-    async def create_message_number(
+    async def update_statuses_codes_batch(
         self,
         conn: Connection,
         *,
-        number: str,
-        message_id: int,
-    ) -> Record: ...
+        message_ids: List[int],
+        status_codes: List[int],
+        user_id: int,
+        updated_at: datetime.datetime,
+    ) -> List[Record]: ...
+    async def create_messages_bulk(
+        self,
+        conn: Connection,
+        *,
+        contents: List[str],
+        numbers: List[str],
+        numbers_idx: List[int],
+        user_id: int,
+        status_code: int,
+        created_at: datetime.datetime,
+        topic: str,
+    ) -> List[Record]: ...
+    async def update_messages_status_code(
+        self,
+        conn: Connection,
+        *,
+        message_ids: List[int],
+        status_code: int,
+        updated_at: datetime.datetime,
+    ) -> None: ...
     async def get_user_messages(
-        self, conn: Connection, *, user_id: int, status_code: int
-    ) -> Record: ...
+        self, conn: Connection, *, user_id: int, limit: int
+    ) -> List[Record]: ...
+    async def get_user_messages_after_cursor(
+        self,
+        conn: Connection,
+        *,
+        user_id: int,
+        cursor_created_at: datetime.datetime,
+        cursor_id: int,
+        limit: int,
+    ) -> List[Record]: ...
+    async def get_user_messages_with_sent(
+        self, conn: Connection, *, user_id: int, limit: int
+    ) -> List[Record]: ...
+    async def get_user_messages_with_sent_after_cursor(
+        self,
+        conn: Connection,
+        *,
+        user_id: int,
+        cursor_created_at: datetime.datetime,
+        cursor_id: int,
+        limit: int,
+    ) -> List[Record]: ...
+
+class OutboxQueriesMixin:
+    async def claim_outbox_batch(
+        self, conn: Connection, *, limit: int, lease_seconds: float
+    ) -> List[Record]: ...
+    async def delete_outbox_rows(
+        self, conn: Connection, *, outbox_ids: List[int]
+    ) -> None: ...
 
 class Queries(
     UsersQueriesMixin,
     StatusesQueriesMixin,
     MessagesQueriesMixin,
+    OutboxQueriesMixin,
 ): ...
 
 queries: Queries
@@ -6,19 +6,24 @@ SELECT msg.id,
        msg.created_at,
        msg.updated_at,
        msg.content,
-       status.name as status_name,
-       status.description as status_description,
        (SELECT ARRAY(
-                SELECT number
-                FROM "public"."messageNumbers" nums
-                WHERE nums.message_id = msg.id
+                SELECT rcpt.number
+                FROM "public"."messageRecipients" msg_rcpt
+                    INNER JOIN "public"."recipient" rcpt ON rcpt.id = msg_rcpt.recipient_id
+                WHERE msg_rcpt.message_id = msg.id
+                  AND msg_rcpt.message_created_at = msg.created_at
+                ORDER BY msg_rcpt.position
             )
        ) as numbers_arr
 FROM "public"."message" msg
-    INNER JOIN "public"."status" status ON status.code = msg.status_code
 WHERE msg.id = :message_id
 
 --name: get-user-messages
+-- Sent messages (140) are excluded. Listings have literal status predicates,
+-- so generic plans of prepared statements can use the partial index.
+-- Numbers are looked up per row, one messageRecipients primary key scan per
+-- message. Grouped join, LATERAL lookup and a second query merged in Python
+-- were not faster, see scripts/benchmark_numbers.py
 SELECT msg.id,
        msg.user_id,
        msg.status_code,
@@ -26,40 +31,299 @@ SELECT msg.id,
        msg.created_at,
        msg.updated_at,
        msg.content,
-       status.name as status_name,
-       status.description as status_description,
        (SELECT ARRAY(
-                SELECT number
-                FROM "public"."messageNumbers" nums
-                WHERE nums.message_id = msg.id
-	        )
+                SELECT rcpt.number
+                FROM "public"."messageRecipients" msg_rcpt
+                    INNER JOIN "public"."recipient" rcpt ON rcpt.id = msg_rcpt.recipient_id
+                WHERE msg_rcpt.message_id = msg.id
+                  AND msg_rcpt.message_created_at = msg.created_at
+                ORDER BY msg_rcpt.position
+            )
+       ) as numbers_arr
+FROM "public"."message" msg
+WHERE msg.user_id = :user_id AND msg.status_code <= 130
+ORDER BY msg.created_at DESC, msg.id DESC
+LIMIT :limit;
+
+--name: get-user-messages-after-cursor
+SELECT msg.id,
+       msg.user_id,
+       msg.status_code,
+       msg.user_id as author_id,
+       msg.created_at,
+       msg.updated_at,
+       msg.content,
+       (SELECT ARRAY(
+                SELECT rcpt.number
+                FROM "public"."messageRecipients" msg_rcpt
+                    INNER JOIN "public"."recipient" rcpt ON rcpt.id = msg_rcpt.recipient_id
+                WHERE msg_rcpt.message_id = msg.id
+                  AND msg_rcpt.message_created_at = msg.created_at
+                ORDER BY msg_rcpt.position
+            )
+       ) as numbers_arr
+FROM "public"."message" msg
+WHERE msg.user_id = :user_id
+  AND msg.status_code <= 130
+  AND msg.created_at <= :cursor_created_at -- lets planner prune partitions
+  AND (msg.created_at, msg.id) < (:cursor_created_at, :cursor_id)
+ORDER BY msg.created_at DESC, msg.id DESC
+LIMIT :limit;
+
+--name: get-user-messages-with-sent
+SELECT msg.id,
+       msg.user_id,
+       msg.status_code,
+       msg.user_id as author_id,
+       msg.created_at,
+       msg.updated_at,
+       msg.content,
+       (SELECT ARRAY(
+                SELECT rcpt.number
+                FROM "public"."messageRecipients" msg_rcpt
+                    INNER JOIN "public"."recipient" rcpt ON rcpt.id = msg_rcpt.recipient_id
+                WHERE msg_rcpt.message_id = msg.id
+                  AND msg_rcpt.message_created_at = msg.created_at
+                ORDER BY msg_rcpt.position
+            )
+       ) as numbers_arr
+FROM "public"."message" msg
+WHERE msg.user_id = :user_id AND msg.status_code <= 140
+ORDER BY msg.created_at DESC, msg.id DESC
+LIMIT :limit;
+
+--name: get-user-messages-with-sent-after-cursor
+SELECT msg.id,
+       msg.user_id,
+       msg.status_code,
+       msg.user_id as author_id,
+       msg.created_at,
+       msg.updated_at,
+       msg.content,
+       (SELECT ARRAY(
+                SELECT rcpt.number
+                FROM "public"."messageRecipients" msg_rcpt
+                    INNER JOIN "public"."recipient" rcpt ON rcpt.id = msg_rcpt.recipient_id
+                WHERE msg_rcpt.message_id = msg.id
+                  AND msg_rcpt.message_created_at = msg.created_at
+                ORDER BY msg_rcpt.position
+            )
        ) as numbers_arr
 FROM "public"."message" msg
-    INNER JOIN "public"."status" status ON status.code = msg.status_code
-WHERE msg.user_id = :user_id AND msg.status_code <= :status_code
-ORDER BY msg.created_at DESC
-LIMIT 5000;
+WHERE msg.user_id = :user_id
+  AND msg.status_code <= 140
+  AND msg.created_at <= :cursor_created_at -- lets planner prune partitions
+  AND (msg.created_at, msg.id) < (:cursor_created_at, :cursor_id)
+ORDER BY msg.created_at DESC, msg.id DESC
+LIMIT :limit;
+
+--name: get-user-messages-after-id
+-- Replay fallback: messages committed late, after ones with greater IDs
+-- were already delivered, are not returned
+SELECT msg.id,
+       msg.user_id,
+       msg.status_code,
+       msg.user_id as author_id,
+       msg.created_at,
+       msg.updated_at,
+       msg.content,
+       (SELECT ARRAY(
+                SELECT rcpt.number
+                FROM "public"."messageRecipients" msg_rcpt
+                    INNER JOIN "public"."recipient" rcpt ON rcpt.id = msg_rcpt.recipient_id
+                WHERE msg_rcpt.message_id = msg.id
+                  AND msg_rcpt.message_created_at = msg.created_at
+                ORDER BY msg_rcpt.position
+            )
+       ) as numbers_arr
+FROM "public"."message" msg
+WHERE msg.user_id = :user_id AND msg.id > :message_id
+ORDER BY msg.id
+LIMIT :limit;
+
+--name: get-user-pending-messages
+-- Messages created (110) or pushed (120), but not acked by device yet
+SELECT msg.id,
+       msg.user_id,
+       msg.status_code,
+       msg.user_id as author_id,
+       msg.created_at,
+       msg.updated_at,
+       msg.content,
+       (SELECT ARRAY(
+                SELECT rcpt.number
+                FROM "public"."messageRecipients" msg_rcpt
+                    INNER JOIN "public"."recipient" rcpt ON rcpt.id = msg_rcpt.recipient_id
+                WHERE msg_rcpt.message_id = msg.id
+                  AND msg_rcpt.message_created_at = msg.created_at
+                ORDER BY msg_rcpt.position
+            )
+       ) as numbers_arr
+FROM "public"."message" msg
+WHERE msg.user_id = :user_id AND msg.status_code < 130
+ORDER BY msg.id
+LIMIT :limit;
+
+--name: export-user-messages
+SELECT msg.id,
+       msg.user_id as author_id,
+       msg.created_at,
+       msg.updated_at,
+       msg.content,
+       msg.status_code,
+       (SELECT ARRAY(
+                SELECT rcpt.number
+                FROM "public"."messageRecipients" msg_rcpt
+                    INNER JOIN "public"."recipient" rcpt ON rcpt.id = msg_rcpt.recipient_id
+                WHERE msg_rcpt.message_id = msg.id
+                  AND msg_rcpt.message_created_at = msg.created_at
+                ORDER BY msg_rcpt.position
+            )
+       ) as numbers_arr
+FROM "public"."message" msg
+WHERE msg.user_id = :user_id
+ORDER BY msg.created_at, msg.id;
 
 --name: get-message-numbers
-SELECT number.id,
-       number.number,
-       number.message_id
-FROM "public"."messageNumbers" number
-WHERE number.message_id = :message_id
+SELECT rcpt.id,
+       rcpt.number,
+       msg_rcpt.message_id
+FROM "public"."messageRecipients" msg_rcpt
+    INNER JOIN "public"."recipient" rcpt ON rcpt.id = msg_rcpt.recipient_id
+WHERE msg_rcpt.message_id = :message_id
+ORDER BY msg_rcpt.position
+
+--name: upsert-recipients!
+INSERT INTO "public"."recipient" (number)
+SELECT DISTINCT nums.number
+FROM unnest(:numbers::text[]) AS nums(number)
+ORDER BY nums.number
+ON CONFLICT (number) DO NOTHING
+
+--name: create-message^
+WITH inserted AS (
+    INSERT INTO "public"."message" (content, user_id, created_at, updated_at, status_code)
+    VALUES (:content, :user_id, :created_at, :updated_at, :status_code)
+    RETURNING id, user_id, status_code, created_at, updated_at, content
+), inserted_recipients AS (
+    INSERT INTO "public"."messageRecipients" (message_id, message_created_at, position, recipient_id)
+    SELECT inserted.id, inserted.created_at, nums.position, rcpt.id
+    FROM inserted,
+        unnest(:numbers::text[]) WITH ORDINALITY AS nums(number, position)
+        INNER JOIN "public"."recipient" rcpt ON rcpt.number = nums.number
+    RETURNING position, recipient_id
+), inserted_outbox AS (
+    INSERT INTO "public"."messageOutbox" (message_id, message_created_at, topic)
+    SELECT inserted.id, inserted.created_at, :topic
+    FROM inserted
+)
+SELECT inserted.id,
+       inserted.user_id,
+       inserted.status_code,
+       inserted.user_id as author_id,
+       inserted.created_at,
+       inserted.updated_at,
+       inserted.content,
+       ARRAY(
+           SELECT rcpt.number
+           FROM inserted_recipients
+               INNER JOIN "public"."recipient" rcpt
+                   ON rcpt.id = inserted_recipients.recipient_id
+           ORDER BY inserted_recipients.position
+       ) as numbers_arr
+FROM inserted
+
+--name: update-status-code^
+WITH target AS (
+    SELECT msg.id, msg.user_id
+    FROM "public"."message" msg
+    WHERE msg.id = :message_id
+), updated AS (
+    UPDATE "public"."message" msg
+    SET status_code = :status_code,
+        updated_at = :updated_at
+    FROM target
+    WHERE msg.id = target.id AND target.user_id = :user_id
+    RETURNING msg.id, msg.user_id, msg.status_code, msg.created_at, msg.updated_at, msg.content
+)
+SELECT target.user_id as owner_id,
+       updated.id,
+       updated.user_id,
+       updated.status_code,
+       updated.user_id as author_id,
+       updated.created_at,
+       updated.updated_at,
+       updated.content,
+       (SELECT ARRAY(
+                SELECT rcpt.number
+                FROM "public"."messageRecipients" msg_rcpt
+                    INNER JOIN "public"."recipient" rcpt ON rcpt.id = msg_rcpt.recipient_id
+                WHERE msg_rcpt.message_id = updated.id
+                  AND msg_rcpt.message_created_at = updated.created_at
+                ORDER BY msg_rcpt.position
+            )
+       ) as numbers_arr
+FROM target
+    LEFT JOIN updated ON updated.id = target.id
 
---name: create-message<!
-INSERT INTO "public"."message" (content, user_id, created_at, updated_at, status_code)
-VALUES (:content, :user_id, :created_at, :updated_at, :status_code)
-RETURNING id, updated_at
+--name: update-statuses-codes-batch
+WITH batch AS (
+    SELECT src.id, src.status_code, src.idx
+    FROM unnest(:message_ids::int[], :status_codes::int[])
+        WITH ORDINALITY AS src(id, status_code, idx)
+), target AS (
+    SELECT batch.id, batch.status_code, batch.idx, msg.user_id
+    FROM batch
+        LEFT JOIN "public"."message" msg ON msg.id = batch.id
+), updated AS (
+    UPDATE "public"."message" msg
+    SET status_code = target.status_code,
+        updated_at = :updated_at
+    FROM target
+    WHERE msg.id = target.id AND target.user_id = :user_id
+    RETURNING msg.id, msg.status_code
+)
+SELECT target.id,
+       target.user_id as owner_id,
+       updated.status_code
+FROM target
+    LEFT JOIN updated ON updated.id = target.id
+ORDER BY target.idx;
 
---name: create-message-number<!
-INSERT INTO "public"."messageNumbers" (number, message_id)
-VALUES (:number, :message_id)
-RETURNING id, number, message_id
+--name: create-messages-bulk
+-- Every input message takes its ID from the sequence together with its
+-- input position, recipients and outbox rows are linked by that position
+WITH msg_input AS MATERIALIZED (
+    SELECT nextval('"public"."message_id_seq"')::integer AS id, src.content, src.idx
+    FROM unnest(:contents::text[]) WITH ORDINALITY AS src(content, idx)
+), inserted AS (
+    INSERT INTO "public"."message" (id, content, user_id, created_at, updated_at, status_code)
+    SELECT msg_input.id, msg_input.content, :user_id, :created_at, :created_at, :status_code
+    FROM msg_input
+    ORDER BY msg_input.idx
+), inserted_outbox AS (
+    INSERT INTO "public"."messageOutbox" (message_id, message_created_at, topic)
+    SELECT msg_input.id, :created_at, :topic
+    FROM msg_input
+    ORDER BY msg_input.idx
+), inserted_recipients AS (
+    INSERT INTO "public"."messageRecipients" (message_id, message_created_at, position, recipient_id)
+    SELECT msg_input.id,
+           :created_at,
+           row_number() OVER (PARTITION BY nums.idx ORDER BY nums.ord),
+           rcpt.id
+    FROM unnest(:numbers::text[], :numbers_idx::bigint[])
+            WITH ORDINALITY AS nums(number, idx, ord)
+        INNER JOIN msg_input ON msg_input.idx = nums.idx
+        INNER JOIN "public"."recipient" rcpt ON rcpt.number = nums.number
+)
+SELECT msg_input.id
+FROM msg_input
+ORDER BY msg_input.idx;
 
---name: update-status-code<!
+--name: update-messages-status-code!
+-- Status only moves forward, messages already acked by devices stay as is
 UPDATE "public"."message"
 SET status_code = :status_code,
     updated_at = :updated_at
-WHERE id = :message_id
-RETURNING id, updated_at
\ No newline at end of file
+WHERE id = ANY(:message_ids::int[]) AND status_code < :status_code
@@ -0,0 +1,43 @@
+--name: claim-outbox-batch
+-- Claimed rows are leased for :lease_seconds, locked and leased rows are
+-- skipped, so concurrent dispatchers never get the same row
+WITH claimed AS (
+    UPDATE "public"."messageOutbox" outbox
+    SET claimed_until = now() + make_interval(secs => :lease_seconds)
+    FROM (
+        SELECT free.id
+        FROM "public"."messageOutbox" free
+        WHERE free.claimed_until IS NULL OR free.claimed_until < now()
+        ORDER BY free.id
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    ) free
+    WHERE outbox.id = free.id
+    RETURNING outbox.id, outbox.message_id, outbox.message_created_at, outbox.topic
+)
+SELECT claimed.id as outbox_id,
+       claimed.topic,
+       msg.id,
+       msg.user_id,
+       msg.status_code,
+       msg.user_id as author_id,
+       msg.created_at,
+       msg.updated_at,
+       msg.content,
+       (SELECT ARRAY(
+                SELECT rcpt.number
+                FROM "public"."messageRecipients" msg_rcpt
+                    INNER JOIN "public"."recipient" rcpt ON rcpt.id = msg_rcpt.recipient_id
+                WHERE msg_rcpt.message_id = msg.id
+                  AND msg_rcpt.message_created_at = msg.created_at
+                ORDER BY msg_rcpt.position
+            )
+       ) as numbers_arr
+FROM claimed
+    LEFT JOIN "public"."message" msg
+        ON msg.id = claimed.message_id AND msg.created_at = claimed.message_created_at
+ORDER BY claimed.id;
+
+--name: delete-outbox-rows!
+DELETE FROM "public"."messageOutbox"
+WHERE id = ANY(:outbox_ids::bigint[])
@@ -22,4 +22,16 @@ SELECT status.id,
 FROM "public"."status" status
 	INNER JOIN "public"."statusHeader" header ON status.status_header_id = header.id
 WHERE header.id = :header_id
-ORDER BY status.code
\ No newline at end of file
+ORDER BY status.code
+
+-- name: get-all-statuses
+SELECT status.id,
+       status.code as status_code,
+       status.name as status_code_name,
+       status.description as status_code_description,
+       header.id as status_header_id,
+       header.name as status_header_name,
+       header.description as status_header_description
+FROM "public"."status" status
+	INNER JOIN "public"."statusHeader" header ON status.status_header_id = header.id
+ORDER BY status.code
@@ -1,10 +1,23 @@
+from typing import Union
+
 from asyncpg.connection import Connection
 
+from app.db.connection import ConnectionHandle, ReadConnectionHandle
+
 
 class BaseRepository:
-    def __init__(self, conn: Connection) -> None:
+    def __init__(self, conn: Union[Connection, ConnectionHandle]) -> None:
         self._conn = conn
 
     @property
-    def connection(self) -> Connection:
+    def connection(self) -> Union[Connection, ConnectionHandle]:
+        return self._conn
+
+    @property
+    def read_connection(
+        self,
+    ) -> Union[Connection, ConnectionHandle, ReadConnectionHandle]:
+        """Connection for read-only queries, may be served by replica"""
+        if isinstance(self._conn, ConnectionHandle):
+            return self._conn.reader
         return self._conn
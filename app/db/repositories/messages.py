@@ -1,94 +1,243 @@
-from typing import List
+import datetime
+from typing import AsyncIterator, List, Optional, Tuple
 
-from app.db.errors import EntityDoesNotExist
+from asyncpg import Record
+
+from app.db.catalogs import get_statuses_catalog
+from app.db.errors import (EntityAccessDenied, EntityDoesNotExist,
+                           EntityRelationsMismatch)
+from app.db.queries.prepared import prepared_queries
 from app.db.queries.queries import queries
 from app.db.repositories.base import BaseRepository
 from app.models.domain.messages import Message, StatusMessageMeta
-from app.models.schemas.messages import MessageInCreate
+from app.models.schemas.messages import (MessageInCreate,
+                                         MessageStatusInResponse,
+                                         MessageStatusInUpdate)
 from app.models.schemas.users import User
+from app.resources import strings
+from app.services.topics import get_user_messages_topic
+
+
+def message_from_row(row: Record) -> Message:
+    status = get_statuses_catalog().get_by_code(row["status_code"])
+    return Message(
+        **dict(row),
+        numbers=[n for n in row["numbers_arr"]],
+        status_meta=StatusMessageMeta(
+            status_code=row["status_code"],
+            status_name=status["status_code_name"],
+            status_description=status["status_code_description"],
+        ),
+    )
 
 
 class MessagesRepository(BaseRepository):
     async def get_message_by_id(self, *, message_id: int) -> Message:
-        message_row = await queries.get_message_by_id(
-            self.connection, message_id=message_id
+        message_row = await self.get_message_row_by_id(message_id=message_id)
+        return message_from_row(message_row)
+
+    async def get_message_row_by_id(self, *, message_id: int) -> Record:
+        message_row = await prepared_queries.get_message_by_id(
+            self.read_connection, message_id=message_id
         )
         if message_row:
-            message_meta = StatusMessageMeta(**dict(message_row))
-            return Message(
-                **dict(message_row),
-                numbers=[n for n in message_row["numbers_arr"]],
-                status_meta=message_meta,
-            )
+            return message_row
 
         raise EntityDoesNotExist(f"Message with ID: {message_id} does not exist")
 
+    async def get_user_messages_after_id(
+        self, *, user_id: int, message_id: int, limit: int
+    ) -> List[Message]:
+        messages_rows = await queries.get_user_messages_after_id(
+            self.read_connection, user_id=user_id, message_id=message_id, limit=limit
+        )
+        return [message_from_row(row) for row in messages_rows]
+
+    async def get_user_pending_messages_rows(
+        self, *, user_id: int, limit: int
+    ) -> List[Record]:
+        """Oldest messages not acked by device yet. Always read from primary,
+        so just acked or just created messages aren't missed on a lagging replica
+        """
+        return await queries.get_user_pending_messages(
+            self.connection, user_id=user_id, limit=limit
+        )
+
+    async def iter_user_messages(self, *, user_id: int) -> AsyncIterator[Record]:
+        """Iterate over all user's messages with a server-side cursor"""
+        async with queries.export_user_messages_cursor(
+            self.read_connection, user_id=user_id
+        ) as cursor:
+            async for row in cursor:
+                yield row
+
     async def get_message_numbers_by_id(self, message_id: int) -> List[str]:
         phones_rows = await queries.get_message_numbers(
-            self.connection, message_id=message_id
+            self.read_connection, message_id=message_id
         )
         return [row["number"] for row in phones_rows]
 
+    async def _upsert_recipients(self, *, numbers: List[str]) -> None:
+        """Make sure all numbers have a recipient row. Runs as a separate
+        statement, so the following insert sees rows added concurrently
+        """
+        await queries.upsert_recipients(
+            self.connection, numbers=list(dict.fromkeys(numbers))
+        )
+
     async def create_message(
         self, *, user: User, message_body: MessageInCreate
     ) -> Message:
+        """Create message and queue it in the outbox for delivery.
+        Nothing is stored when some numbers weren't linked to the message
+        """
         message = Message(**message_body.dict(), author_id=user.id)
         async with self.connection.transaction():
-            message_row = await queries.create_message(
+            await self._upsert_recipients(numbers=message.numbers)
+            message_row = await prepared_queries.create_message(
                 self.connection,
                 content=message.content,
                 user_id=user.id,
                 status_code=message_body.status_code,
                 created_at=message.created_at,
                 updated_at=message.updated_at,
+                numbers=message.numbers,
+                topic=get_user_messages_topic(user_id=user.id, username=user.username),
             )
-            message = message.copy(update=dict(message_row))
-            numbers_rows = []
-            for n in message.numbers:  # TODO: Check how to do it as a bulk insert
-                row = await queries.create_message_number(
-                    self.connection, number=n, message_id=message.id
+            linked_count = len(message_row["numbers_arr"])
+            if linked_count != len(message.numbers):
+                raise EntityRelationsMismatch(
+                    f"Only {linked_count} of {len(message.numbers)} numbers "
+                    f"were linked to the message"
                 )
-                numbers_rows.append(row)
-        return await self.get_message_by_id(message_id=message.id)
+        return message_from_row(message_row)
+
+    async def create_messages_bulk(
+        self, *, user: User, messages_bodies: List[MessageInCreate]
+    ) -> List[int]:
+        """Create many messages with all their numbers in one transaction.
+        IDs of created messages are returned in the order of bodies
+        """
+        created_at = datetime.datetime.now()
+        numbers, numbers_idx = [], []
+        for idx, body in enumerate(messages_bodies, start=1):
+            numbers.extend(body.numbers)
+            numbers_idx.extend([idx] * len(body.numbers))
+
+        async with self.connection.transaction():
+            await self._upsert_recipients(numbers=numbers)
+            ids_rows = await queries.create_messages_bulk(
+                self.connection,
+                contents=[body.content for body in messages_bodies],
+                numbers=numbers,
+                numbers_idx=numbers_idx,
+                user_id=user.id,
+                status_code=messages_bodies[0].status_code,
+                created_at=created_at,
+                topic=get_user_messages_topic(user_id=user.id, username=user.username),
+            )
+        return [row["id"] for row in ids_rows]
+
+    async def update_messages_status_code(
+        self, *, message_ids: List[int], status_code: int
+    ) -> None:
+        """Move messages forward to the status, ones already past it are kept"""
+        await queries.update_messages_status_code(
+            self.connection,
+            message_ids=message_ids,
+            status_code=status_code,
+            updated_at=datetime.datetime.now(),
+        )
 
     async def update_status_code(
-        self, *, message: Message, status_code: int
+        self, *, message_id: int, user_id: int, status_code: int
     ) -> Message:
-        updated_message = Message(
-            id=message.id,
-            content=message.content,
-            numbers=message.numbers,
-            author_id=message.author_id,
+        """Update status of user's own message in a single statement"""
+        message_row = await prepared_queries.update_status_code(
+            self.connection,
+            message_id=message_id,
+            user_id=user_id,
+            updated_at=datetime.datetime.now(),
+            status_code=status_code,
         )
-        if message:
-            async with self.connection.transaction():
-                message_row = await queries.update_status_code(
-                    self.connection,
-                    message_id=updated_message.id,
-                    updated_at=updated_message.updated_at,
-                    status_code=status_code,
-                )
-        return await self.get_message_by_id(message_id=updated_message.id)
+        if not message_row:
+            raise EntityDoesNotExist(f"Message with ID: {message_id} does not exist")
+        if message_row["id"] is None:
+            raise EntityAccessDenied(
+                f"Message with ID: {message_id} is not owned by user ID: {user_id}"
+            )
+
+        return message_from_row(message_row)
+
+    async def update_statuses_codes_batch(
+        self, *, user_id: int, statuses: List[MessageStatusInUpdate]
+    ) -> List[MessageStatusInResponse]:
+        """Update statuses of many user's own messages in a single statement.
+        Result is returned for each item, when a message is listed more than
+        once the last status wins and all its items report it
+        """
+        latest_codes = {item.id: item.status_code for item in statuses}
+        rows = await queries.update_statuses_codes_batch(
+            self.connection,
+            message_ids=list(latest_codes.keys()),
+            status_codes=list(latest_codes.values()),
+            user_id=user_id,
+            updated_at=datetime.datetime.now(),
+        )
+        results_by_id = {}
+        for row in rows:
+            if row["owner_id"] is None:
+                error = strings.MESSAGE_DOES_NOT_EXIST_ERROR
+            elif row["status_code"] is None:
+                error = strings.NOT_OBJECT_OWNER
+            else:
+                error = None
+            results_by_id[row["id"]] = MessageStatusInResponse(
+                id=row["id"],
+                status_code=row["status_code"],
+                updated=error is None,
+                error=error,
+            )
+        return [results_by_id[item.id] for item in statuses]
 
     async def get_user_messages(
-        self, *, user_id: int, sent_included: bool
+        self,
+        *,
+        user_id: int,
+        sent_included: bool,
+        limit: int,
+        cursor: Optional[Tuple[datetime.datetime, int]] = None,
     ) -> List[Message]:
-        if sent_included:
-            messages_rows = await queries.get_user_messages(
-                self.connection, user_id=user_id, status_code=140
-            )  # TODO: Refactor to use statuses correctly
-        else:
-            messages_rows = await queries.get_user_messages(
-                self.connection, user_id=user_id, status_code=130
-            )  # TODO: Refactor to use statuses correctly
-        result = []
-        for row in messages_rows:
-            meta = StatusMessageMeta(**dict(row))
-            msg = Message(
-                **dict(row),
-                status_meta=meta,
-                numbers=[n for n in row["numbers_arr"]],
-            )
-            result.append(msg)
+        messages_rows = await self.get_user_messages_rows(
+            user_id=user_id, sent_included=sent_included, limit=limit, cursor=cursor
+        )
+        return [message_from_row(row) for row in messages_rows]
 
-        return result
+    async def get_user_messages_rows(
+        self,
+        *,
+        user_id: int,
+        sent_included: bool,
+        limit: int,
+        cursor: Optional[Tuple[datetime.datetime, int]] = None,
+    ) -> List[Record]:
+        if cursor:
+            cursor_created_at, cursor_id = cursor
+            get_page_after_cursor = (
+                prepared_queries.get_user_messages_with_sent_after_cursor
+                if sent_included
+                else prepared_queries.get_user_messages_after_cursor
+            )
+            return await get_page_after_cursor(
+                self.read_connection,
+                user_id=user_id,
+                cursor_created_at=cursor_created_at,
+                cursor_id=cursor_id,
+                limit=limit,
+            )
+        get_page = (
+            prepared_queries.get_user_messages_with_sent
+            if sent_included
+            else prepared_queries.get_user_messages
+        )
+        return await get_page(self.read_connection, user_id=user_id, limit=limit)
@@ -0,0 +1,19 @@
+from typing import List
+
+from asyncpg import Record
+
+from app.db.queries.queries import queries
+from app.db.repositories.base import BaseRepository
+
+
+class OutboxRepository(BaseRepository):
+    async def claim_batch(self, *, limit: int, lease_seconds: float) -> List[Record]:
+        """Lease up to `limit` oldest free outbox rows with their messages.
+        Rows leased by other dispatchers are skipped until the lease expires
+        """
+        return await queries.claim_outbox_batch(
+            self.connection, limit=limit, lease_seconds=lease_seconds
+        )
+
+    async def delete_rows(self, *, outbox_ids: List[int]) -> None:
+        await queries.delete_outbox_rows(self.connection, outbox_ids=outbox_ids)
@@ -1,5 +1,7 @@
 from typing import List
 
+from app.db.catalogs import (StatusesCatalog, get_statuses_catalog,
+                             set_statuses_catalog)
 from app.db.errors import EntityDoesNotExist
 from app.db.queries.queries import queries
 from app.db.repositories.base import BaseRepository
@@ -7,19 +9,34 @@ from app.models.schemas.statuses import StatusMeta
 
 
 class StatusesRepository(BaseRepository):
+    async def refresh_catalog(self) -> StatusesCatalog:
+        """Load all statuses into in-memory catalog used for lookups"""
+        status_rows = await queries.get_all_statuses(self.connection)
+        catalog = StatusesCatalog(status_rows)
+        set_statuses_catalog(catalog)
+        return catalog
+
     async def get_status_by_id(self, *, status_id: int) -> StatusMeta:
-        status_row = await queries.get_status_by_id(
-            self.connection, status_id=status_id
-        )
+        catalog = get_statuses_catalog()
+        if catalog is not None:
+            status_row = catalog.get_by_id(status_id)
+        else:
+            status_row = await queries.get_status_by_id(
+                self.read_connection, status_id=status_id
+            )
         if status_row:
             return StatusMeta(**dict(status_row))
 
         raise EntityDoesNotExist(f"Status row ID: {status_id} does not exist")
 
     async def get_statuses_by_header_id(self, *, header_id: int) -> List[StatusMeta]:
-        status_rows = await queries.get_statuses_by_header_id(
-            self.connection, header_id=header_id
-        )
+        catalog = get_statuses_catalog()
+        if catalog is not None:
+            status_rows = catalog.get_by_header_id(header_id)
+        else:
+            status_rows = await queries.get_statuses_by_header_id(
+                self.read_connection, header_id=header_id
+            )
         if status_rows:
             return [StatusMeta(**dict(row)) for row in status_rows]
 
@@ -1,20 +1,35 @@
 from app.db.errors import EntityDoesNotExist
+from app.db.queries.prepared import prepared_queries
 from app.db.queries.queries import queries
 from app.db.repositories.base import BaseRepository
 from app.models.domain.users import UserInDB
+from app.services.cache import get_users_cache
 
 
 class UsersRepository(BaseRepository):
     async def get_user_by_email(self, *, email: str) -> UserInDB:
-        user_row = await queries.get_user_by_email(self.connection, email=email)
+        user_row = await prepared_queries.get_user_by_email(
+            self.read_connection, email=email
+        )
         if user_row:
             return UserInDB(**user_row)
 
         raise EntityDoesNotExist("User with email {0} does not exist".format(email))
 
+    async def get_cached_user_by_username(self, *, username: str) -> UserInDB:
+        """Same as `get_user_by_username` but served from the in-process
+        users cache while entry is fresh
+        """
+        users_cache = get_users_cache()
+        user = users_cache.get(username)
+        if user is None:
+            user = await self.get_user_by_username(username=username)
+            users_cache.set(username, user)
+        return user
+
     async def get_user_by_username(self, *, username: str) -> UserInDB:
-        user_row = await queries.get_user_by_username(
-            self.connection,
+        user_row = await prepared_queries.get_user_by_username(
+            self.read_connection,
             username=username,
         )
         if user_row:
@@ -32,7 +47,7 @@ class UsersRepository(BaseRepository):
         password: str,
     ) -> UserInDB:
         user = UserInDB(username=username, email=email)
-        user.change_password(password)
+        await user.change_password_async(password)
         user.is_active = True
 
         async with self.connection.transaction():
@@ -46,4 +61,5 @@ class UsersRepository(BaseRepository):
                 hashed_password=user.hashed_password,
                 is_active=user.is_active,
             )
+        get_users_cache().invalidate(user.username)
         return user.copy(update=dict(user_row))
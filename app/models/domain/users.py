@@ -19,3 +19,14 @@ class UserInDB(User):
     def change_password(self, password: str) -> None:
         self.salt = security.generate_salt()
         self.hashed_password = security.get_password_hash(self.salt + password)
+
+    async def check_password_async(self, password: str) -> bool:
+        return await security.verify_password_async(
+            self.salt + password, self.hashed_password
+        )
+
+    async def change_password_async(self, password: str) -> None:
+        self.salt = security.generate_salt()
+        self.hashed_password = await security.get_password_hash_async(
+            self.salt + password
+        )
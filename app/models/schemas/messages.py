@@ -1,12 +1,11 @@
-from typing import List
+from typing import List, Optional
 
-import phonenumbers
-from phonenumbers import NumberParseException, PhoneNumberFormat
 from pydantic import PrivateAttr
 from pydantic.class_validators import validator
 
 from app.models.domain.messages import Message
 from app.models.schemas.rwschema import RWSchema
+from app.services.phones import get_numbers_normalizer
 
 
 class MessageInCreate(RWSchema):
@@ -27,27 +26,66 @@ class MessageInCreate(RWSchema):
         return v
 
     @validator("numbers")
-    def numbers_list_len(cls, v: str) -> str:
+    def valid_numbers(cls, v: List[str]) -> List[str]:
         if len(v) < 1:
             raise ValueError("You must specify at least one phone number")
         if len(v) > 20:
             raise ValueError("You can't create message with more than 20 numbers")
-        return v
-
-    @validator("numbers", always=True, each_item=True)
-    def valid_number(cls, number: str) -> str:
-        if len(number) < 6:
-            raise ValueError("Number length should be greater than 6")
-        if len(number) > 17:
-            raise ValueError("Number length should be less than 17")
-        try:
-            phone_number = phonenumbers.parse(number)
-        except NumberParseException as exc:
-            raise ValueError(exc)
-        if not phonenumbers.is_possible_number(phone_number):
-            raise ValueError(f"Provided number `{number}` is not possible")
-        return phonenumbers.format_number(phone_number, PhoneNumberFormat.INTERNATIONAL)
+        return get_numbers_normalizer().normalize_many(v)
 
 
 class MessagesInResponse(RWSchema):
     messages: List[Message]
+    next_cursor: Optional[str] = None
+
+
+class MessagesInBulkCreate(RWSchema):
+    messages: List[MessageInCreate]
+
+    @validator("messages")
+    def messages_list_len(cls, v: List[MessageInCreate]) -> List[MessageInCreate]:
+        if len(v) < 1:
+            raise ValueError("You must specify at least one message")
+        if len(v) > 10000:
+            raise ValueError("You can't create more than 10000 messages at once")
+        return v
+
+
+class MessagesIdsInResponse(RWSchema):
+    ids: List[int]
+
+
+class MessageStatusInUpdate(RWSchema):
+    id: int
+    status_code: int
+
+    @validator("status_code")
+    def allowed_status_code(cls, code: int) -> int:
+        if code not in (130, 140):  # TODO: Refactor to use statuses correctly
+            raise ValueError("Only `received` (130) or `sent` (140) status allowed")
+        return code
+
+
+class MessagesStatusesInBatchUpdate(RWSchema):
+    statuses: List[MessageStatusInUpdate]
+
+    @validator("statuses")
+    def statuses_list_len(
+        cls, v: List[MessageStatusInUpdate]
+    ) -> List[MessageStatusInUpdate]:
+        if len(v) < 1:
+            raise ValueError("You must specify at least one status")
+        if len(v) > 10000:
+            raise ValueError("You can't update more than 10000 statuses at once")
+        return v
+
+
+class MessageStatusInResponse(RWSchema):
+    id: int
+    status_code: Optional[int] = None
+    updated: bool
+    error: Optional[str] = None
+
+
+class MessagesStatusesInResponse(RWSchema):
+    statuses: List[MessageStatusInResponse]
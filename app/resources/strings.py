@@ -2,6 +2,7 @@
 
 USER_DOES_NOT_EXIST_ERROR = "user does not exist"
 MESSAGE_DOES_NOT_EXIST_ERROR = "message does not exist"
+MALFORMED_CURSOR = "provided paging cursor is malformed"
 USER_INACTIVE_ERROR = "user is not active"
 
 INCORRECT_LOGIN_INPUT = "incorrect email or password"
@@ -0,0 +1,508 @@
+import asyncio
+import json
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+import asyncpg
+from asyncpg.connection import Connection
+from asyncpg.pool import Pool
+from fastapi.encoders import jsonable_encoder
+from fastapi_websocket_pubsub.event_notifier import (ALL_TOPICS, EventNotifier,
+                                                     Subscription, TopicList)
+from fastapi_websocket_pubsub.pub_sub_server import PubSubEndpoint
+from fastapi_websocket_pubsub.rpc_event_methods import RpcEventServerMethods
+from fastapi_websocket_rpc.simplewebsocket import JsonSerializingWebSocket
+from fastapi_websocket_rpc.utils import gen_uid
+from fastapi_websocket_rpc.websocket_rpc_endpoint import WebsocketRPCEndpoint
+from loguru import logger
+from pydantic import BaseModel
+from pydantic.json import pydantic_encoder
+
+from app.core.config import get_app_settings
+from app.core.settings.base import PubSubBackendTypes
+from app.db.connection import ConnectionHandle
+from app.db.errors import EntityDoesNotExist
+from app.db.repositories.messages import MessagesRepository
+from app.db.repositories.users import UsersRepository
+from app.services.jwt import get_token_claims
+from app.services.replay import ReplayBuffer
+from app.services.topics import get_user_id_from_topic, get_user_messages_topic
+
+NOTIFY_PAYLOAD_LIMIT = 7999  # bytes, PostgreSQL rejects longer NOTIFY payloads
+
+
+class SerializedContent:
+    """Content already rendered to JSON, so it's sent to subscribers as is"""
+
+    __slots__ = ("json", "id")
+
+    def __init__(self, json_: str, id_: Optional[int] = None) -> None:
+        self.json = json_
+        self.id = id_
+
+    def __repr__(self) -> str:
+        return f"SerializedContent({self.json})"
+
+    @classmethod
+    def from_model(cls, model: BaseModel) -> "SerializedContent":
+        return cls(model.json(by_alias=True), getattr(model, "id", None))
+
+
+class SerializedContentWebSocket(JsonSerializingWebSocket):
+    """RPC socket which splices `SerializedContent` JSON into the RPC envelope
+    instead of encoding the content again for every subscriber
+    """
+
+    def _serialize(self, msg: BaseModel) -> str:
+        token = uuid.uuid4().hex
+        contents: Dict[str, SerializedContent] = {}
+
+        def encoder(obj: Any) -> Any:
+            if isinstance(obj, SerializedContent):
+                placeholder = f"{token}:{len(contents)}"
+                contents[placeholder] = obj
+                return placeholder
+            return pydantic_encoder(obj)
+
+        serialized = msg.json(encoder=encoder)
+        for placeholder, content in contents.items():
+            serialized = serialized.replace(f'"{placeholder}"', content.json, 1)
+        return serialized
+
+
+class RWRpcEventServerMethods(RpcEventServerMethods):
+    def __init__(
+        self, event_notifier: EventNotifier, endpoint: "RWPubSubEndpoint"
+    ) -> None:
+        super().__init__(event_notifier)
+        self._endpoint = endpoint
+
+    async def subscribe(
+        self,
+        topics: TopicList = [],
+        last_message_id: Optional[int] = None,
+        token: Optional[str] = None,
+    ) -> bool:
+        """Subscribe to topics. When `last_message_id` and a valid access
+        `token` are provided, content of the token owner's topic published
+        after that message is replayed before live content
+        """
+        replaying: Dict[str, List[Any]] = {}
+        if last_message_id is not None:
+            for topic in await self._endpoint.get_replay_topics(topics, token):
+                replaying[topic] = []
+
+        async def callback(subscription: Subscription, data: Any) -> None:
+            pending = replaying.get(subscription.topic)
+            if pending is not None:  # delivered after replay, in order
+                pending.append(data)
+                return
+            await self.channel.other.notify(
+                subscription=subscription.copy(exclude={"callback"}), data=data
+            )
+
+        try:
+            await self.event_notifier.subscribe(
+                self.channel.id, topics, callback, self.channel
+            )
+        except Exception as exc:
+            logger.exception(f"Failed to subscribe to {topics}: {exc}")
+            return False
+        if replaying:
+            self._endpoint.run_task(self._replay(replaying, last_message_id))
+        return True
+
+    async def _replay(
+        self, replaying: Dict[str, List[Any]], last_message_id: int
+    ) -> None:
+        for topic, pending in list(replaying.items()):
+            subscription = Subscription(
+                id=gen_uid(), subscriber_id=self.channel.id, topic=topic
+            )
+            last_id = last_message_id
+            replayed_ids: Set[int] = set()
+            try:
+                contents, complete = await self._endpoint.get_missed_contents(
+                    topic, last_message_id
+                )
+                for content in contents:
+                    await self.channel.other.notify(
+                        subscription=subscription, data=content
+                    )
+                    last_id = content.id
+                    replayed_ids.add(content.id)
+                if not complete:
+                    await self.channel.other.notify(
+                        subscription=subscription,
+                        data={"replayTruncated": True, "lastMessageId": last_id},
+                    )
+            finally:
+                # Live content received meanwhile, skipping already replayed
+                while pending:
+                    data = pending.pop(0)
+                    if isinstance(data, SerializedContent) and (
+                        data.id in replayed_ids
+                    ):
+                        continue
+                    await self.channel.other.notify(
+                        subscription=subscription, data=data
+                    )
+                del replaying[topic]
+
+
+class RWPubSubEndpoint(PubSubEndpoint):
+    def __init__(
+        self,
+        *,
+        replay_buffer: ReplayBuffer,
+        replay_db_limit: int,
+        secret_key: str,
+    ) -> None:
+        super().__init__()
+        self.methods = RWRpcEventServerMethods(self.notifier, self)
+        self.endpoint = WebsocketRPCEndpoint(
+            self.methods,
+            on_disconnect=[self.on_disconnect],
+            serializing_socket_cls=SerializedContentWebSocket,
+        )
+        self.replay_buffer = replay_buffer
+        self.replay_db_limit = replay_db_limit
+        self.secret_key = secret_key
+        self.pool: Optional[Pool] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._waiters: Dict[str, Set[asyncio.Event]] = {}
+        self._subscribers: Dict[str, Set[str]] = {}
+        self.notifier.register_subscribe_event(self._on_subscribe)
+        self.notifier.register_unsubscribe_event(self._on_unsubscribe)
+
+    async def publish(self, topics: Union[TopicList, str], data: Any = None) -> None:
+        for topic in [topics] if isinstance(topics, str) else topics:
+            if isinstance(data, SerializedContent) and data.id is not None:
+                self.replay_buffer.record(topic, data.id, data)
+            for waiter in self._waiters.get(topic, ()):
+                waiter.set()
+        await super().publish(topics, data)
+
+    def has_listeners(self, topic: str) -> bool:
+        """Whether content published to the topic would reach anyone
+        on this worker: a subscriber or a content waiter
+        """
+        return bool(
+            self._subscribers.get(topic)
+            or self._subscribers.get(ALL_TOPICS)
+            or self._waiters.get(topic)
+        )
+
+    def record_unloaded(self, topic: str, content_id: int) -> None:
+        """Keep place of content nobody here listened to in the replay buffer,
+        it's loaded from database only if it's replayed
+        """
+        self.replay_buffer.record(topic, content_id, None)
+
+    async def _on_subscribe(self, subscriber_id: str, topics: TopicList) -> None:
+        for topic in topics:
+            self._subscribers.setdefault(topic, set()).add(subscriber_id)
+
+    async def _on_unsubscribe(self, subscriber_id: str, topics: TopicList) -> None:
+        for topic in topics:
+            subscribers = self._subscribers.get(topic)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscriber_id)
+            if not subscribers:
+                del self._subscribers[topic]
+
+    @contextmanager
+    def content_waiter(self, topic: str) -> Iterator[asyncio.Event]:
+        """Event which is set when content is published to the topic
+        on this worker while the context is entered
+        """
+        waiter = asyncio.Event()
+        self._waiters.setdefault(topic, set()).add(waiter)
+        try:
+            yield waiter
+        finally:
+            waiters = self._waiters[topic]
+            waiters.discard(waiter)
+            if not waiters:
+                del self._waiters[topic]
+
+    async def get_replay_topics(
+        self, topics: TopicList, token: Optional[str]
+    ) -> List[str]:
+        """Topics content may be replayed to: only the messages topic
+        of the user owning the access token
+        """
+        if not token or self.pool is None:
+            return []
+        try:
+            username, _ = get_token_claims(token, self.secret_key)
+            user = await UsersRepository(
+                ConnectionHandle(self.pool)
+            ).get_cached_user_by_username(username=username)
+        except (ValueError, EntityDoesNotExist):
+            return []
+        if not user.is_active:
+            return []
+        user_topic = get_user_messages_topic(user_id=user.id, username=user.username)
+        return [topic for topic in topics if topic == user_topic]
+
+    async def get_missed_contents(
+        self, topic: str, last_message_id: int
+    ) -> Tuple[List[SerializedContent], bool]:
+        """Missed content from the replay buffer and whether it's complete.
+        Falls back to database when the gap is too old for the buffer,
+        at most `replay_db_limit` messages are loaded from there.
+        Database replay goes by message ID, so messages committed or
+        published after ones with greater IDs the subscriber has already
+        seen are missed. The topic has to be authorized with `get_replay_topics`
+        """
+        buffered = self.replay_buffer.since(topic, last_message_id)
+        if buffered is not None:
+            return await self._load_unloaded(buffered), True
+
+        user_id = get_user_id_from_topic(topic)
+        if user_id is None or self.pool is None:
+            return [], True
+        messages_repo = MessagesRepository(ConnectionHandle(self.pool))
+        messages = await messages_repo.get_user_messages_after_id(
+            user_id=user_id, message_id=last_message_id, limit=self.replay_db_limit + 1
+        )
+        complete = len(messages) <= self.replay_db_limit
+        return [
+            SerializedContent.from_model(message)
+            for message in messages[: self.replay_db_limit]
+        ], complete
+
+    async def _load_unloaded(
+        self, buffered: List[Tuple[int, Any]]
+    ) -> List[SerializedContent]:
+        contents = []
+        messages_repo = MessagesRepository(ConnectionHandle(self.pool))
+        for content_id, content in buffered:
+            if content is None:
+                try:
+                    message = await messages_repo.get_message_by_id(
+                        message_id=content_id
+                    )
+                except EntityDoesNotExist:
+                    continue
+                content = SerializedContent.from_model(message)
+            contents.append(content)
+        return contents
+
+    def run_task(self, coro: Any) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+class LocalBroadcaster:
+    """In-process broadcaster. Delivers published content
+    only to subscribers connected to the current worker
+    """
+
+    def __init__(self, endpoint: RWPubSubEndpoint) -> None:
+        self.endpoint = endpoint
+
+    async def connect(self, pool: Pool) -> None:
+        """Nothing to connect for in-process delivery,
+        pool is used only for replaying missed content
+        """
+        self.endpoint.pool = pool
+
+    async def disconnect(self) -> None:
+        """Nothing to disconnect for in-process delivery"""
+
+    async def publish(self, *, topic: str, data: Any) -> None:
+        await self.endpoint.publish(topics=topic, data=data)
+
+
+class PostgresBroadcaster(LocalBroadcaster):
+    """Broadcaster over PostgreSQL LISTEN/NOTIFY. Every worker listens
+    to the same channel and delivers received content to own subscribers,
+    so content published on one worker reaches subscribers of all of them.
+    Only topic and message ID are notified, receivers load the message
+    from database, so content size is never limited by NOTIFY payload
+    """
+
+    def __init__(
+        self,
+        endpoint: RWPubSubEndpoint,
+        *,
+        dsn: str,
+        channel: str,
+        health_check_interval: float,
+    ) -> None:
+        super().__init__(endpoint)
+        self._dsn = dsn
+        self._channel = channel
+        self._health_check_interval = health_check_interval
+        self._pool: Optional[Pool] = None
+        self._listen_conn: Optional[Connection] = None
+        self._closing = False
+        self._reconnecting = False
+        self._health_task: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._last_deliveries: Dict[str, asyncio.Task] = {}
+
+    async def connect(self, pool: Pool) -> None:
+        await super().connect(pool)
+        self._pool = pool
+        self._closing = False
+        await self._listen()
+        self._health_task = asyncio.create_task(self._check_health())
+        logger.info(f"Listening to pub/sub channel `{self._channel}`")
+
+    async def disconnect(self) -> None:
+        self._closing = True
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        if self._listen_conn is not None:
+            if not self._listen_conn.is_closed():
+                await self._listen_conn.remove_listener(
+                    self._channel, self._on_notification
+                )
+                await self._listen_conn.close()
+            self._listen_conn = None
+
+    async def publish(self, *, topic: str, data: Any) -> None:
+        if isinstance(data, SerializedContent) and data.id is not None:
+            payload = f"{topic}\n{data.id}"
+        else:
+            if isinstance(data, SerializedContent):
+                data_json = data.json
+            else:
+                data_json = json.dumps(jsonable_encoder(data, by_alias=False))
+            payload = f"{topic}\n\n{data_json}"
+            if len(payload.encode()) > NOTIFY_PAYLOAD_LIMIT:
+                logger.warning(
+                    f"Content for topic `{topic}` is too large for NOTIFY, "
+                    "delivering it to local subscribers only"
+                )
+                await super().publish(topic=topic, data=data)
+                return
+
+        async with self._pool.acquire() as conn:
+            await conn.execute("SELECT pg_notify($1, $2)", self._channel, payload)
+
+    async def _listen(self) -> None:
+        conn = await asyncpg.connect(self._dsn)
+        await conn.add_listener(self._channel, self._on_notification)
+        conn.add_termination_listener(self._on_listen_terminated)
+        self._listen_conn = conn
+
+    def _on_listen_terminated(self, conn: Connection) -> None:
+        if self._closing or conn is not self._listen_conn:
+            return
+        logger.error(f"Pub/sub connection for `{self._channel}` is lost")
+        self._run_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        if self._reconnecting:
+            return
+        self._reconnecting = True
+        delay = 0.5
+        try:
+            while not self._closing:
+                try:
+                    await self._listen()
+                except (OSError, asyncpg.PostgresError) as exc:
+                    logger.warning(f"Pub/sub reconnect failed, retrying: {exc}")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self._health_check_interval)
+                else:
+                    logger.info(f"Listening to pub/sub channel `{self._channel}` again")
+                    return
+        finally:
+            self._reconnecting = False
+
+    async def _check_health(self) -> None:
+        """Dead TCP connections are not always noticed by asyncpg,
+        so the listening connection is pinged periodically
+        """
+        while True:
+            await asyncio.sleep(self._health_check_interval)
+            conn = self._listen_conn
+            if conn is None or conn.is_closed():
+                continue
+            try:
+                await asyncio.wait_for(
+                    conn.fetchval("SELECT 1"), timeout=self._health_check_interval
+                )
+            except (asyncio.TimeoutError, OSError, asyncpg.PostgresError) as exc:
+                logger.error(f"Pub/sub connection health check failed: {exc}")
+                conn.terminate()
+
+    def _on_notification(
+        self, conn: Connection, pid: int, channel: str, payload: str
+    ) -> None:
+        topic, data_id, data_json = (payload.split("\n", 2) + [""])[:3]
+        previous = self._last_deliveries.get(topic)
+        task = self._run_task(self._deliver(topic, data_id, data_json, previous))
+        self._last_deliveries[topic] = task
+        task.add_done_callback(lambda _: self._forget_delivery(topic, task))
+
+    async def _deliver(
+        self,
+        topic: str,
+        data_id: str,
+        data_json: str,
+        previous: Optional[asyncio.Task],
+    ) -> None:
+        """Load notified content and deliver it to local subscribers.
+        Loading goes concurrently, delivery keeps the order within the topic.
+        Messages nobody listens to on this worker aren't loaded, only their
+        IDs are kept for replay
+        """
+        if data_id and not self.endpoint.has_listeners(topic):
+            if previous is not None:
+                await asyncio.wait([previous])
+            self.endpoint.record_unloaded(topic, int(data_id))
+            return
+        if data_id:
+            messages_repo = MessagesRepository(ConnectionHandle(self._pool))
+            try:
+                message = await messages_repo.get_message_by_id(message_id=int(data_id))
+            except EntityDoesNotExist:
+                logger.warning(f"Notified message {data_id} does not exist")
+                return
+            content = SerializedContent.from_model(message)
+        else:
+            content = SerializedContent(data_json)
+        if previous is not None:
+            await asyncio.wait([previous])
+        await super().publish(topic=topic, data=content)
+
+    def _forget_delivery(self, topic: str, task: asyncio.Task) -> None:
+        if self._last_deliveries.get(topic) is task:
+            del self._last_deliveries[topic]
+
+    def _run_task(self, coro: Any) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+
+@lru_cache
+def get_broadcaster() -> LocalBroadcaster:
+    settings = get_app_settings()
+    endpoint = RWPubSubEndpoint(
+        replay_buffer=ReplayBuffer(
+            size=settings.replay_buffer_size, max_topics=settings.replay_max_topics
+        ),
+        replay_db_limit=settings.replay_db_limit,
+        secret_key=str(settings.secret_key.get_secret_value()),
+    )
+    if settings.pubsub_backend == PubSubBackendTypes.postgres:
+        return PostgresBroadcaster(
+            endpoint,
+            dsn=str(settings.pubsub_url or settings.database_url),
+            channel=settings.pubsub_channel,
+            health_check_interval=settings.pubsub_health_check_interval_seconds,
+        )
+    return LocalBroadcaster(endpoint)
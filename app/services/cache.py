@@ -0,0 +1,60 @@
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Hashable, Optional
+
+from app.core.config import get_app_settings
+
+
+class TTLCache:
+    """Bounded LRU cache which entries expire after `ttl` seconds"""
+
+    def __init__(self, *, maxsize: int, ttl: float) -> None:
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Put value into cache. Provided `ttl` can only shorten the default one"""
+        ttl = self._ttl if ttl is None else min(ttl, self._ttl)
+        if self._maxsize <= 0 or ttl <= 0:
+            return
+        expires_at = time.monotonic() + ttl
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+@lru_cache
+def get_users_cache() -> TTLCache:
+    settings = get_app_settings()
+    return TTLCache(
+        maxsize=settings.users_cache_size, ttl=settings.users_cache_ttl_seconds
+    )
+
+
+@lru_cache
+def get_tokens_cache() -> TTLCache:
+    settings = get_app_settings()
+    return TTLCache(maxsize=settings.jwt_cache_size, ttl=settings.jwt_cache_ttl_seconds)
@@ -0,0 +1,20 @@
+import json
+from typing import AsyncIterator
+
+from asyncpg import Record
+
+from app.services.serialization import message_row_to_dict
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ROWS_PER_CHUNK = 500
+
+
+async def messages_to_ndjson(rows: AsyncIterator[Record]) -> AsyncIterator[bytes]:
+    chunk = []
+    async for row in rows:
+        chunk.append(json.dumps(message_row_to_dict(row)))
+        if len(chunk) >= ROWS_PER_CHUNK:
+            yield ("\n".join(chunk) + "\n").encode()
+            chunk = []
+    if chunk:
+        yield ("\n".join(chunk) + "\n").encode()
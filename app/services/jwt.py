@@ -1,12 +1,14 @@
 import functools
+import time
 from datetime import datetime, timedelta
-from typing import Any, Callable, Dict
+from typing import Any, Callable, Dict, Tuple
 
 import jwt
 from pydantic import ValidationError
 
 from app.models.schemas.jwt import JWTMeta, JWTToken, JWTUser
 from app.models.schemas.users import User
+from app.services.cache import get_tokens_cache
 
 JWT_ACCESS_SUBJECT = "access"
 ALGORITHM = "HS256"
@@ -63,3 +65,22 @@ def get_username_from_token(token: str, secret_key: str) -> str:
 @handle_jwt
 def get_token_meta(token: str, secret_key: str) -> JWTMeta:
     return JWTMeta(**jwt.decode(token, secret_key, algorithms=[ALGORITHM]))
+
+
+@handle_jwt
+def _decode_token_claims(token: str, secret_key: str) -> Tuple[str, JWTMeta]:
+    payload = jwt.decode(token, secret_key, algorithms=[ALGORITHM])
+    return JWTUser(**payload).username, JWTMeta(**payload)
+
+
+def get_token_claims(token: str, secret_key: str) -> Tuple[str, JWTMeta]:
+    """Get username and token meta with a single decode.
+    Already verified tokens are served from cache until they expire
+    """
+    tokens_cache = get_tokens_cache()
+    cache_key = (token, secret_key)
+    claims = tokens_cache.get(cache_key)
+    if claims is None:
+        claims = _decode_token_claims(token, secret_key)
+        tokens_cache.set(cache_key, claims, ttl=claims[1].exp.timestamp() - time.time())
+    return claims
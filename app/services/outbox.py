@@ -0,0 +1,183 @@
+"""Outbox dispatcher.
+
+Runs inside the app when `OUTBOX_DISPATCH_IN_APP` is set, or as separate
+processes (with the `postgres` pub/sub backend, so content reaches
+subscribers of every app worker):
+    python -m app.services.outbox
+"""
+import asyncio
+from functools import lru_cache
+from typing import List, Optional
+
+import asyncpg
+from asyncpg.pool import Pool
+from loguru import logger
+
+from app.core.config import get_app_settings
+from app.core.settings.base import PubSubBackendTypes
+from app.db.connection import ConnectionHandle
+from app.db.queries.prepared import prepared_queries
+from app.db.repositories.messages import MessagesRepository, message_from_row
+from app.db.repositories.outbox import OutboxRepository
+from app.db.repositories.statuses import StatusesRepository
+from app.services.broadcasting import SerializedContent, get_broadcaster
+from app.services.sockets import Publisher, get_publisher
+
+
+class OutboxDispatcher:
+    """Workers leasing outbox rows in batches, handing their messages
+    to the publisher and marking delivered ones as pushed. No transaction
+    is kept open while content is published: rows which weren't delivered
+    in time are left leased and claimed again once the lease expires,
+    so content is delivered at least once
+    """
+
+    def __init__(
+        self,
+        publisher: Publisher,
+        *,
+        workers: int,
+        batch_size: int,
+        poll_interval: float,
+        lease_seconds: float,
+        publish_timeout: float,
+    ) -> None:
+        self._publisher = publisher
+        self._workers_count = workers
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._lease_seconds = lease_seconds
+        self._publish_timeout = publish_timeout
+        self._pool: Optional[Pool] = None
+        self._stopping = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self, pool: Pool) -> None:
+        self._pool = pool
+        self._stopping.clear()
+        self._workers = [
+            asyncio.create_task(self._work()) for _ in range(self._workers_count)
+        ]
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """Let workers finish current batches and stop"""
+        self._stopping.set()
+        try:
+            await asyncio.wait_for(asyncio.gather(*self._workers), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Outbox dispatcher didn't finish batches in time")
+            for worker in self._workers:
+                worker.cancel()
+        self._workers = []
+
+    async def dispatch_batch(self) -> int:
+        """Dispatch one batch, returns number of claimed outbox rows"""
+        async with self._pool.acquire() as conn:
+            rows = await OutboxRepository(conn).claim_batch(
+                limit=self._batch_size, lease_seconds=self._lease_seconds
+            )
+        if not rows:
+            return 0
+
+        done_ids = []
+        deliveries = []
+        for row in rows:
+            if row["id"] is None:  # message partition is already expired
+                done_ids.append(row["outbox_id"])
+                continue
+            content = SerializedContent.from_model(message_from_row(row))
+            delivered = await self._publisher.publish(topic=row["topic"], data=content)
+            deliveries.append((row, delivered))
+
+        if deliveries:
+            await asyncio.wait(
+                [delivered for _, delivered in deliveries],
+                timeout=self._publish_timeout,
+            )
+        message_ids = []
+        for row, delivered in deliveries:
+            if delivered.done() and delivered.result():
+                message_ids.append(row["id"])
+                done_ids.append(row["outbox_id"])
+        if len(message_ids) < len(deliveries):
+            logger.warning(
+                f"{len(deliveries) - len(message_ids)} outbox messages weren't "
+                "delivered, they'll be retried when the lease expires"
+            )
+
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                await MessagesRepository(conn).update_messages_status_code(
+                    message_ids=message_ids, status_code=120
+                )  # TODO: Refactor to use statuses correctly
+                await OutboxRepository(conn).delete_rows(outbox_ids=done_ids)
+        return len(rows)
+
+    async def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                dispatched = await self.dispatch_batch()
+            except Exception as exc:
+                logger.exception(f"Failed to dispatch outbox batch: {exc}")
+                dispatched = 0
+            if dispatched < self._batch_size:
+                try:
+                    await asyncio.wait_for(
+                        self._stopping.wait(), timeout=self._poll_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+
+@lru_cache
+def get_outbox_dispatcher() -> OutboxDispatcher:
+    settings = get_app_settings()
+    return OutboxDispatcher(
+        get_publisher(),
+        workers=settings.outbox_workers,
+        batch_size=settings.outbox_batch_size,
+        poll_interval=settings.outbox_poll_interval_seconds,
+        lease_seconds=settings.outbox_lease_seconds,
+        publish_timeout=settings.outbox_publish_timeout_seconds,
+    )
+
+
+async def run_dispatcher() -> None:
+    """Standalone dispatcher process. Only the `postgres` pub/sub backend
+    reaches subscribers of app workers, with the `local` one messages would
+    be published to nobody and still marked as pushed
+    """
+    settings = get_app_settings()
+    if settings.pubsub_backend != PubSubBackendTypes.postgres:
+        raise RuntimeError(
+            "Standalone outbox dispatcher requires PUBSUB_BACKEND=postgres, "
+            f"got {settings.pubsub_backend.value}"
+        )
+    pool = await asyncpg.create_pool(
+        str(settings.database_url),
+        min_size=1,
+        max_size=settings.outbox_workers * 2,  # publishing may take one more
+        init=prepared_queries.init_connection,
+    )
+    await StatusesRepository(ConnectionHandle(pool)).refresh_catalog()
+    broadcaster = get_broadcaster()
+    publisher = get_publisher()
+    dispatcher = get_outbox_dispatcher()
+    await broadcaster.connect(pool)
+    await publisher.start()
+    await dispatcher.start(pool)
+    logger.info(f"Outbox dispatcher started with {settings.outbox_workers} workers")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await dispatcher.stop(timeout=settings.publish_flush_timeout_seconds)
+        await publisher.stop(timeout=settings.publish_flush_timeout_seconds)
+        await broadcaster.disconnect()
+        await pool.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run_dispatcher())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,23 @@
+import base64
+import binascii
+import datetime
+from typing import Tuple
+
+CURSOR_SEPARATOR = "|"
+
+
+def encode_cursor(created_at: datetime.datetime, id_: int) -> str:
+    raw = f"{created_at.isoformat()}{CURSOR_SEPARATOR}{id_}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, id_ = raw.split(CURSOR_SEPARATOR)
+        cursor = datetime.datetime.fromisoformat(created_at), int(id_)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as decode_error:
+        raise ValueError("Malformed paging cursor") from decode_error
+    if cursor[0].tzinfo is not None:  # messages timestamps are naive
+        raise ValueError("Malformed paging cursor")
+    return cursor
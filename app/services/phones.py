@@ -0,0 +1,58 @@
+from functools import lru_cache
+from typing import Iterable, List
+
+import phonenumbers
+from phonenumbers import NumberParseException, PhoneNumberFormat
+
+from app.core.config import get_app_settings
+
+
+def normalize_number(number: str) -> str:
+    """Validate phone number and format it in international format"""
+    if len(number) < 6:
+        raise ValueError("Number length should be greater than 6")
+    if len(number) > 17:
+        raise ValueError("Number length should be less than 17")
+    try:
+        phone_number = phonenumbers.parse(number)
+    except NumberParseException as exc:
+        raise ValueError(exc)
+    if not phonenumbers.is_possible_number(phone_number):
+        raise ValueError(f"Provided number `{number}` is not possible")
+    return phonenumbers.format_number(phone_number, PhoneNumberFormat.INTERNATIONAL)
+
+
+class NumbersNormalizer:
+    """`normalize_number` behind a bounded LRU cache keyed by raw number.
+    Invalid numbers are not cached
+    """
+
+    def __init__(self, *, maxsize: int) -> None:
+        self._normalize = lru_cache(maxsize=maxsize)(normalize_number)
+
+    @property
+    def hit_ratio(self) -> float:
+        info = self._normalize.cache_info()
+        lookups = info.hits + info.misses
+        return info.hits / lookups if lookups else 0.0
+
+    def normalize(self, number: str) -> str:
+        return self._normalize(number)
+
+    def normalize_many(self, numbers: Iterable[str]) -> List[str]:
+        """Normalize all numbers keeping the order of first occurrence.
+        Duplicates (raw or after formatting) are dropped
+        """
+        normalized = {}
+        for number in numbers:
+            if number not in normalized:
+                normalized[number] = self._normalize(number)
+        return list(dict.fromkeys(normalized.values()))
+
+    def clear(self) -> None:
+        self._normalize.cache_clear()
+
+
+@lru_cache
+def get_numbers_normalizer() -> NumbersNormalizer:
+    return NumbersNormalizer(maxsize=get_app_settings().numbers_cache_size)
@@ -0,0 +1,55 @@
+from collections import OrderedDict, deque
+from typing import Any, Deque, List, Optional, Tuple
+
+
+class _TopicBuffer:
+    def __init__(self, size: int, first_id: int) -> None:
+        # In publish order, which isn't the order of IDs: messages claimed
+        # by concurrent outbox workers are published in any order
+        self.items: Deque[Tuple[int, Any]] = deque(maxlen=size)
+        # Content with ID greater than floor is either kept or wasn't published
+        # yet, raised to the highest evicted ID
+        self.floor = first_id - 1
+
+
+class ReplayBuffer:
+    """Bounded per-topic ring buffer of recently published content.
+    Lets reconnected subscribers get what they missed
+    since the last seen content ID
+    """
+
+    def __init__(self, *, size: int, max_topics: int) -> None:
+        self._size = size
+        self._max_topics = max_topics
+        self._topics: "OrderedDict[str, _TopicBuffer]" = OrderedDict()
+
+    def record(self, topic: str, content_id: int, content: Any) -> None:
+        if self._size <= 0 or self._max_topics <= 0:
+            return
+        buffer = self._topics.get(topic)
+        if buffer is None:
+            buffer = self._topics[topic] = _TopicBuffer(self._size, content_id)
+            while len(self._topics) > self._max_topics:
+                self._topics.popitem(last=False)
+        self._topics.move_to_end(topic)
+
+        if len(buffer.items) == buffer.items.maxlen:
+            buffer.floor = max(buffer.floor, buffer.items[0][0])
+        buffer.items.append((content_id, content))
+
+    def since(self, topic: str, last_id: int) -> Optional[List[Tuple[int, Any]]]:
+        """`(content_id, content)` published after `last_id`, in publish order.
+        While `last_id` is buffered, everything published after it is
+        returned, including content with lower IDs published late.
+        Otherwise content with greater IDs is returned.
+        None when the buffer doesn't cover the whole gap
+        """
+        buffer = self._topics.get(topic)
+        if buffer is None:
+            return None
+        for position, (content_id, _) in enumerate(buffer.items):
+            if content_id == last_id:
+                return list(buffer.items)[position + 1 :]
+        if last_id < buffer.floor:
+            return None
+        return [item for item in buffer.items if item[0] > last_id]
@@ -1,9 +1,26 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
 import bcrypt
 from passlib.context import CryptContext
 
+from app.core.config import get_app_settings
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+@lru_cache
+def get_password_executor() -> ThreadPoolExecutor:
+    """Bounded pool for bcrypt work, so it doesn't block the event loop.
+    Its size is a limit of concurrently running hash operations
+    """
+    return ThreadPoolExecutor(
+        max_workers=get_app_settings().password_hashing_workers,
+        thread_name_prefix="password-hashing",
+    )
+
+
 def generate_salt() -> str:
     return bcrypt.gensalt().decode()
 
@@ -14,3 +31,17 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_password_executor(), verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_password_executor(), get_password_hash, password
+    )
@@ -0,0 +1,35 @@
+from typing import Any, Dict
+
+import orjson
+from asyncpg import Record
+from fastapi.responses import JSONResponse
+
+from app.db.catalogs import get_statuses_catalog
+from app.models.domain.rwmodel import convert_datetime_to_realworld
+
+
+def message_row_to_dict(row: Record) -> Dict[str, Any]:
+    """Build the same camelCase shape as `Message` JSON without pydantic"""
+    status = get_statuses_catalog().get_by_code(row["status_code"])
+    return {
+        "id": row["id"],
+        "createdAt": convert_datetime_to_realworld(row["created_at"]),
+        "updatedAt": convert_datetime_to_realworld(row["updated_at"]),
+        "content": row["content"],
+        "authorId": row["author_id"],
+        "numbers": list(row["numbers_arr"]),
+        "statusMeta": {
+            "status_code": row["status_code"],
+            "status_name": status["status_code_name"],
+            "status_description": status["status_code_description"],
+        },
+    }
+
+
+class FastJSONResponse(JSONResponse):
+    """Renders already jsonable content with orjson, skipping `response_model`.
+    For strings, ints, lists and dicts output is byte-identical to `JSONResponse`
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
@@ -1,13 +1,151 @@
 import asyncio
-from asyncio import Task
-from typing import Any
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
 
-from fastapi_websocket_pubsub.pub_sub_server import PubSubEndpoint
+from loguru import logger
 
+from app.core.config import get_app_settings
+from app.core.settings.base import PublishOverflowPolicyTypes
+from app.services.broadcasting import LocalBroadcaster, get_broadcaster
 
-async def _task(*, endpoint: PubSubEndpoint, topic: str, data: Any) -> None:
-    await endpoint.publish(topics=topic, data=data)
+_STOP = object()
 
 
-async def publish_content(*, endpoint: PubSubEndpoint, topic: str, data: Any) -> Task:
-    return asyncio.create_task(_task(endpoint=endpoint, topic=topic, data=data))
+class Publisher:
+    """Bounded publish queue drained by a fixed set of workers.
+    Topics are sharded between workers, so content of one topic
+    is always delivered in the order it was published.
+    `publish` returns a future resolved with True once the content
+    is delivered, or False when it's dropped or failed
+    """
+
+    def __init__(
+        self,
+        broadcaster: LocalBroadcaster,
+        *,
+        queue_size: int,
+        workers: int,
+        batch_size: int,
+        overflow_policy: PublishOverflowPolicyTypes,
+    ) -> None:
+        self._broadcaster = broadcaster
+        self._queue_size = max(queue_size // workers, 1)
+        self._workers_count = workers
+        self._batch_size = batch_size
+        self._overflow_policy = overflow_policy
+        self._queues: List[asyncio.Queue] = []
+        self._workers: List[asyncio.Task] = []
+        self._stopping = False
+        self.dropped_count = 0
+
+    async def start(self) -> None:
+        self._stopping = False
+        self._queues = [
+            asyncio.Queue(maxsize=self._queue_size) for _ in range(self._workers_count)
+        ]
+        self._workers = [
+            asyncio.create_task(self._work(queue)) for queue in self._queues
+        ]
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """Flush queued content and stop workers.
+        Content isn't accepted anymore once stopping began, so nothing
+        can push the stop sentinel out of a full queue
+        """
+        self._stopping = True
+
+        async def flush() -> None:
+            for queue in self._queues:
+                await queue.put(_STOP)
+            await asyncio.gather(*self._workers)
+
+        try:
+            await asyncio.wait_for(flush(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Publisher didn't flush queued content in time")
+            for worker in self._workers:
+                worker.cancel()
+        self._workers = []
+
+        for queue in self._queues:
+            while not queue.empty():
+                item = queue.get_nowait()
+                if item is not _STOP:
+                    self._drop(item)
+        self._queues = []
+
+    async def publish(self, *, topic: str, data: Any) -> "asyncio.Future[bool]":
+        if not self._queues or self._stopping:
+            raise RuntimeError("Publisher is not running")
+        queue = self._queues[hash(topic) % len(self._queues)]
+        delivered = asyncio.get_running_loop().create_future()
+        if self._overflow_policy == PublishOverflowPolicyTypes.block:
+            await queue.put((topic, data, delivered))
+            return delivered
+
+        if queue.full():
+            self._drop(queue.get_nowait())
+            queue.task_done()
+            logger.warning("Publish queue is full, oldest content dropped")
+        queue.put_nowait((topic, data, delivered))
+        return delivered
+
+    def _drop(self, item: Tuple[str, Any, "asyncio.Future[bool]"]) -> None:
+        self.dropped_count += 1
+        _resolve(item[2], False)
+
+    async def _work(self, queue: asyncio.Queue) -> None:
+        stopping = False
+        while not stopping:
+            batch = [await queue.get()]
+            while len(batch) < self._batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            if _STOP in batch:
+                stopping = True
+                batch = [item for item in batch if item is not _STOP]
+            await self._publish_batch(batch)
+            for _ in range(len(batch) + stopping):
+                queue.task_done()
+
+    async def _publish_batch(
+        self, batch: List[Tuple[str, Any, "asyncio.Future[bool]"]]
+    ) -> None:
+        """Publish batch grouped by topic. Topics go concurrently,
+        content within a topic goes in order
+        """
+        by_topic: "OrderedDict[str, List[Tuple[Any, asyncio.Future]]]" = OrderedDict()
+        for topic, data, delivered in batch:
+            by_topic.setdefault(topic, []).append((data, delivered))
+        await asyncio.gather(
+            *(self._publish_topic(topic, items) for topic, items in by_topic.items())
+        )
+
+    async def _publish_topic(
+        self, topic: str, items: List[Tuple[Any, "asyncio.Future[bool]"]]
+    ) -> None:
+        for data, delivered in items:
+            try:
+                await self._broadcaster.publish(topic=topic, data=data)
+            except Exception as exc:
+                logger.exception(f"Failed to publish content to `{topic}`: {exc}")
+                _resolve(delivered, False)
+            else:
+                _resolve(delivered, True)
+
+
+def _resolve(future: "asyncio.Future[bool]", result: bool) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+@lru_cache
+def get_publisher() -> Publisher:
+    settings = get_app_settings()
+    return Publisher(
+        get_broadcaster(),
+        queue_size=settings.publish_queue_size,
+        workers=settings.publish_workers,
+        batch_size=settings.publish_batch_size,
+        overflow_policy=settings.publish_overflow_policy,
+    )
@@ -0,0 +1,16 @@
+import re
+from typing import Optional
+
+USER_MESSAGES_TOPIC = "messages:/uid-{user_id}/uname-{username}"
+_USER_MESSAGES_TOPIC_RE = re.compile(r"^messages:/uid-(?P<user_id>\d+)/uname-.+$")
+
+
+def get_user_messages_topic(*, user_id: int, username: str) -> str:
+    return USER_MESSAGES_TOPIC.format(user_id=user_id, username=username)
+
+
+def get_user_id_from_topic(topic: str) -> Optional[int]:
+    match = _USER_MESSAGES_TOPIC_RE.match(topic)
+    if match:
+        return int(match.group("user_id"))
+    return None
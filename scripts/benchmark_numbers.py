@@ -0,0 +1,240 @@
+"""Compare ways to load numbers of a messages page: correlated ARRAY
+subquery per row, LATERAL lookup per row, grouped join over the page and
+a second `unnest` query merged in Python. `shipped` is
+`get-user-messages-with-sent` as it is in app/db/queries/sql.
+
+Seeds a benchmark user with messages into a scratch database (migrations
+are applied to it), times the variants and removes the seeded rows:
+    python -m scripts.benchmark_numbers --dsn postgresql://postgres@localhost/sendy_bench
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List
+
+import asyncpg
+
+from app.db.migrations.runner import apply_migrations
+from app.db.queries.queries import queries
+
+PAGE_QUERY = """
+SELECT msg.id,
+       msg.user_id,
+       msg.status_code,
+       msg.user_id as author_id,
+       msg.created_at,
+       msg.updated_at,
+       msg.content{numbers}
+FROM "public"."message" msg{join}
+WHERE msg.user_id = $1 AND msg.status_code <= $2
+ORDER BY msg.created_at DESC, msg.id DESC
+LIMIT $3
+"""
+
+CORRELATED_QUERY = PAGE_QUERY.format(
+    numbers=""",
+       (SELECT ARRAY(
+                SELECT rcpt.number
+                FROM "public"."messageRecipients" msg_rcpt
+                    INNER JOIN "public"."recipient" rcpt ON rcpt.id = msg_rcpt.recipient_id
+                WHERE msg_rcpt.message_id = msg.id
+                  AND msg_rcpt.message_created_at = msg.created_at
+                ORDER BY msg_rcpt.position
+            )
+       ) as numbers_arr""",
+    join="",
+)
+
+LATERAL_QUERY = PAGE_QUERY.format(
+    numbers=""",
+       COALESCE(numbers.numbers_arr, '{}') as numbers_arr""",
+    join="""
+    LEFT JOIN LATERAL (
+        SELECT array_agg(rcpt.number ORDER BY msg_rcpt.position) as numbers_arr
+        FROM "public"."messageRecipients" msg_rcpt
+            INNER JOIN "public"."recipient" rcpt ON rcpt.id = msg_rcpt.recipient_id
+        WHERE msg_rcpt.message_id = msg.id
+          AND msg_rcpt.message_created_at = msg.created_at
+    ) numbers ON true""",
+)
+
+GROUPED_QUERY = """
+WITH page AS (
+    SELECT msg.id,
+           msg.user_id,
+           msg.status_code,
+           msg.created_at,
+           msg.updated_at,
+           msg.content
+    FROM "public"."message" msg
+    WHERE msg.user_id = $1 AND msg.status_code <= $2
+    ORDER BY msg.created_at DESC, msg.id DESC
+    LIMIT $3
+)
+SELECT page.id,
+       page.user_id,
+       page.status_code,
+       page.user_id as author_id,
+       page.created_at,
+       page.updated_at,
+       page.content,
+       COALESCE(numbers.numbers_arr, '{}') as numbers_arr
+FROM page
+    LEFT JOIN (
+        SELECT msg_rcpt.message_id,
+               array_agg(rcpt.number ORDER BY msg_rcpt.position) as numbers_arr
+        FROM "public"."messageRecipients" msg_rcpt
+            INNER JOIN "public"."recipient" rcpt ON rcpt.id = msg_rcpt.recipient_id
+        WHERE (msg_rcpt.message_id, msg_rcpt.message_created_at)
+            IN (SELECT page.id, page.created_at FROM page)
+        GROUP BY msg_rcpt.message_id
+    ) numbers ON numbers.message_id = page.id
+ORDER BY page.created_at DESC, page.id DESC
+"""
+
+# Page without numbers, numbers of all page messages with a second query
+MESSAGES_QUERY = PAGE_QUERY.format(numbers="", join="")
+
+NUMBERS_QUERY = """
+SELECT msg_rcpt.message_id, rcpt.number
+FROM unnest($1::int[], $2::timestamp[]) AS page(id, created_at)
+    INNER JOIN "public"."messageRecipients" msg_rcpt
+        ON msg_rcpt.message_id = page.id AND msg_rcpt.message_created_at = page.created_at
+    INNER JOIN "public"."recipient" rcpt ON rcpt.id = msg_rcpt.recipient_id
+ORDER BY msg_rcpt.message_id, msg_rcpt.position
+"""
+
+CREATE_USER = """
+INSERT INTO "public"."user" (username, email, salt, hashed_password, is_active)
+VALUES ($1::text, $1::text || '@example.com', '', '', true)
+RETURNING id
+"""
+
+SEED_RECIPIENTS = """
+INSERT INTO "public"."recipient" (number)
+SELECT '+1415555' || lpad(num::text, 4, '0')
+FROM generate_series(0, $1 - 1) num
+ON CONFLICT (number) DO NOTHING
+"""
+
+SEED_MESSAGES = """
+INSERT INTO "public"."message" (content, user_id, status_code, created_at, updated_at)
+SELECT 'Benchmark message ' || num, $1, 110,
+       now() - num * interval '1 second', now() - num * interval '1 second'
+FROM generate_series(1, $2) num
+"""
+
+SEED_MESSAGE_RECIPIENTS = """
+INSERT INTO "public"."messageRecipients" (message_id, message_created_at, position, recipient_id)
+SELECT msg.id, msg.created_at, pos, rcpt.id
+FROM "public"."message" msg
+    CROSS JOIN generate_series(1, $2) pos
+    INNER JOIN "public"."recipient" rcpt
+        ON rcpt.number = '+1415555' || lpad(((msg.id + pos) % $3)::text, 4, '0')
+WHERE msg.user_id = $1
+"""
+
+CLEANUP = (
+    """DELETE FROM "public"."messageRecipients"
+    WHERE message_id IN (SELECT id FROM "public"."message" WHERE user_id = $1)""",
+    'DELETE FROM "public"."message" WHERE user_id = $1',
+    'DELETE FROM "public"."user" WHERE id = $1',
+)
+
+
+async def seed(conn: asyncpg.Connection, args: argparse.Namespace) -> int:
+    async with conn.transaction():
+        user_id = await conn.fetchval(CREATE_USER, f"b{uuid.uuid4().hex[:12]}")
+        await conn.execute(SEED_RECIPIENTS, args.recipients)
+        await conn.execute(SEED_MESSAGES, user_id, args.messages)
+        await conn.execute(
+            SEED_MESSAGE_RECIPIENTS, user_id, args.numbers, args.recipients
+        )
+    await conn.execute('ANALYZE "public"."message", "public"."messageRecipients"')
+    return user_id
+
+
+async def fetch_merged(conn: asyncpg.Connection, params: List[Any]) -> List[Any]:
+    rows = await conn.fetch(MESSAGES_QUERY, *params)
+    numbers: Dict[int, List[str]] = {}
+    for row in await conn.fetch(
+        NUMBERS_QUERY, [row["id"] for row in rows], [row["created_at"] for row in rows]
+    ):
+        numbers.setdefault(row["message_id"], []).append(row["number"])
+    return [(row, numbers.get(row["id"], [])) for row in rows]
+
+
+async def time_variants(
+    variants: Dict[str, Callable[[], Awaitable[Any]]], runs: int
+) -> Dict[str, List[float]]:
+    """Variants run in turns, so drift of the server load hits all alike"""
+    timings: Dict[str, List[float]] = {name: [] for name in variants}
+    for fetch in variants.values():
+        await fetch()  # warm up caches and prepare
+    for _ in range(runs):
+        for name, fetch in variants.items():
+            started = time.perf_counter()
+            await fetch()
+            timings[name].append(time.perf_counter() - started)
+    return timings
+
+
+def report(name: str, timings: List[float]) -> None:
+    print(
+        f"{name:<12} median {statistics.median(timings) * 1000:8.2f} ms  "
+        f"min {min(timings) * 1000:8.2f} ms"
+    )
+
+
+async def benchmark(args: argparse.Namespace) -> None:
+    conn = await asyncpg.connect(args.dsn)
+    try:
+        await apply_migrations(conn)
+        user_id = await seed(conn, args)
+        try:
+            params = [user_id, 140, args.page_size]
+            shipped_params = queries.driver_adapter.maybe_order_params(
+                "get_user_messages_with_sent",
+                {"user_id": user_id, "limit": args.page_size},
+            )
+            variants: Dict[str, Callable[[], Awaitable[Any]]] = {
+                "correlated": lambda: conn.fetch(CORRELATED_QUERY, *params),
+                "lateral": lambda: conn.fetch(LATERAL_QUERY, *params),
+                "grouped": lambda: conn.fetch(GROUPED_QUERY, *params),
+                "merged": lambda: fetch_merged(conn, params),
+                "shipped": lambda: conn.fetch(
+                    queries.get_user_messages_with_sent.sql, *shipped_params
+                ),
+            }
+            timings = await time_variants(variants, args.runs)
+        finally:
+            if not args.keep:
+                for sql in CLEANUP:
+                    await conn.execute(sql, user_id)
+    finally:
+        await conn.close()
+
+    print(
+        f"{args.messages} messages x {args.numbers} numbers, "
+        f"page of {args.page_size}, {args.runs} runs"
+    )
+    for name, variant_timings in timings.items():
+        report(name, variant_timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m scripts.benchmark_numbers")
+    parser.add_argument("--dsn", required=True, help="scratch database DSN")
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--numbers", type=int, default=5, help="per message")
+    parser.add_argument("--recipients", type=int, default=10000)
+    parser.add_argument("--page-size", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="keep seeded rows")
+    asyncio.run(benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+import os
+import tempfile
+
+# Settings are read on import of the app, tests don't need a real database
+# unless `TEST_DATABASE_URL` is set
+os.environ.setdefault("APP_ENV", "test")
+os.environ.setdefault(
+    "DATABASE_URL",
+    os.environ.get("TEST_DATABASE_URL", "postgresql://postgres@localhost/sendy"),
+)
+os.environ.setdefault("LOGGING_DIR_PATH", tempfile.gettempdir())
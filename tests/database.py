@@ -0,0 +1,106 @@
+"""Helpers shared by tests, mostly by ones running against a local PostgreSQL.
+
+Set `TEST_DATABASE_URL` to a scratch database to run them, migrations are
+applied to it and test users are created:
+    TEST_DATABASE_URL=postgresql://postgres@localhost/sendy_test pytest
+"""
+import asyncio
+import os
+import uuid
+from typing import Any, Awaitable, Callable, List, Tuple
+
+import asyncpg
+import pytest
+
+from app.db.connection import ConnectionHandle
+from app.db.migrations.runner import apply_migrations
+from app.db.repositories.messages import MessagesRepository
+from app.db.repositories.statuses import StatusesRepository
+from app.db.repositories.users import UsersRepository
+from app.models.domain.messages import Message
+from app.models.domain.users import UserInDB
+from app.models.schemas.messages import MessageInCreate
+from app.services.topics import get_user_messages_topic
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+requires_database = pytest.mark.skipif(
+    not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set"
+)
+
+
+async def create_pool() -> asyncpg.Pool:
+    """Migrated database pool with statuses catalog loaded"""
+    conn = await asyncpg.connect(TEST_DATABASE_URL)
+    try:
+        await apply_migrations(conn)
+    finally:
+        await conn.close()
+    pool = await asyncpg.create_pool(TEST_DATABASE_URL, min_size=1, max_size=4)
+    await StatusesRepository(ConnectionHandle(pool)).refresh_catalog()
+    return pool
+
+
+def run_with_pool(test: Callable[[asyncpg.Pool], Awaitable[None]]) -> None:
+    """Run async test body with a fresh pool, closed afterwards"""
+
+    async def run() -> None:
+        pool = await create_pool()
+        try:
+            await test(pool)
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
+
+
+async def create_user(pool: asyncpg.Pool) -> UserInDB:
+    return await UsersRepository(ConnectionHandle(pool)).create_user(
+        username=f"t{uuid.uuid4().hex[:12]}",
+        email=f"{uuid.uuid4().hex}@example.com",
+        password="password",
+    )
+
+
+async def create_message(pool: asyncpg.Pool, user: UserInDB, content: str) -> Message:
+    return await MessagesRepository(ConnectionHandle(pool)).create_message(
+        user=user,
+        message_body=MessageInCreate(content=content, numbers=["+14155552671"]),
+    )
+
+
+def get_topic(user: UserInDB) -> str:
+    return get_user_messages_topic(user_id=user.id, username=user.username)
+
+
+class RecordingBroadcaster:
+    """Broadcaster which records published `(topic, data)` pairs,
+    slowly or failing when asked to
+    """
+
+    def __init__(self, delay: float = 0, fail: bool = False) -> None:
+        self.published: List[Tuple[str, Any]] = []
+        self._delay = delay
+        self._fail = fail
+
+    async def publish(self, *, topic: str, data: Any) -> None:
+        await asyncio.sleep(self._delay)
+        if self._fail:
+            raise ConnectionError("Subscribers are unreachable")
+        self.published.append((topic, data))
+
+
+class FakeClock:
+    """Stand-in for `time` module with a clock moved by tests"""
+
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
@@ -0,0 +1,141 @@
+"""PostgresBroadcaster against a local PostgreSQL, see `tests.database`"""
+import asyncio
+import uuid
+from typing import Any, Awaitable, Callable, List
+
+from fastapi_websocket_pubsub.event_notifier import Subscription
+
+from app.services.broadcasting import (PostgresBroadcaster, RWPubSubEndpoint,
+                                       SerializedContent)
+from app.services.replay import ReplayBuffer
+from tests.database import (TEST_DATABASE_URL, create_message, create_pool,
+                            create_user, get_topic, requires_database)
+
+pytestmark = requires_database
+
+
+def make_broadcaster(channel: str) -> PostgresBroadcaster:
+    endpoint = RWPubSubEndpoint(
+        replay_buffer=ReplayBuffer(size=10, max_topics=10),
+        replay_db_limit=10,
+        secret_key="secret",
+    )
+    return PostgresBroadcaster(
+        endpoint, dsn=TEST_DATABASE_URL, channel=channel, health_check_interval=0.5
+    )
+
+
+async def wait_for(condition: Callable[[], bool], timeout: float = 5) -> None:
+    async def poll() -> None:
+        while not condition():
+            await asyncio.sleep(0.05)
+
+    await asyncio.wait_for(poll(), timeout=timeout)
+
+
+def run_with_broadcasters(test: Callable[..., Awaitable[None]], count: int = 2) -> None:
+    async def run() -> None:
+        pool = await create_pool()
+        channel = f"sendy_test_{uuid.uuid4().hex[:8]}"
+        broadcasters: List[PostgresBroadcaster] = []
+        try:
+            for _ in range(count):
+                broadcaster = make_broadcaster(channel)
+                await broadcaster.connect(pool)
+                broadcasters.append(broadcaster)
+            await test(pool, *broadcasters)
+        finally:
+            for broadcaster in broadcasters:
+                await broadcaster.disconnect()
+            await pool.close()
+
+    asyncio.run(run())
+
+
+async def subscribe(broadcaster: PostgresBroadcaster, topic: str) -> List[Any]:
+    """Subscribe to the topic on broadcaster's worker, returns received data"""
+    received: List[Any] = []
+
+    async def callback(subscription: Subscription, data: Any) -> None:
+        received.append(data)
+
+    await broadcaster.endpoint.notifier.subscribe(uuid.uuid4().hex, [topic], callback)
+    return received
+
+
+def test_content_is_loaded_by_receivers() -> None:
+    async def test(pool, publishing, receiving) -> None:
+        user = await create_user(pool)
+        topic = get_topic(user)
+        received = await subscribe(receiving, topic)
+        message = await create_message(pool, user, "Привет, " + "x" * 10000)
+        await publishing.publish(
+            topic=topic, data=SerializedContent.from_model(message)
+        )
+
+        await wait_for(lambda: received)
+        (content,) = received
+        assert content.id == message.id
+        assert content.json == SerializedContent.from_model(message).json
+
+    run_with_broadcasters(test)
+
+
+def test_content_without_listeners_is_loaded_on_replay() -> None:
+    async def test(pool, publishing, receiving) -> None:
+        user = await create_user(pool)
+        topic = get_topic(user)
+        message = await create_message(pool, user, "nobody listens")
+        await publishing.publish(
+            topic=topic, data=SerializedContent.from_model(message)
+        )
+
+        buffer = receiving.endpoint.replay_buffer
+        await wait_for(lambda: buffer.since(topic, message.id - 1))
+        assert buffer.since(topic, message.id - 1) == [(message.id, None)]
+        (content,), complete = await receiving.endpoint.get_missed_contents(
+            topic, message.id - 1
+        )
+        assert complete
+        assert content.json == SerializedContent.from_model(message).json
+
+    run_with_broadcasters(test)
+
+
+def test_delivery_keeps_order_within_topic() -> None:
+    async def test(pool, publishing, receiving) -> None:
+        user = await create_user(pool)
+        topic = get_topic(user)
+        received = await subscribe(receiving, topic)
+        messages = [
+            await create_message(pool, user, f"message {index}") for index in range(6)
+        ]
+        for message in messages:
+            await publishing.publish(
+                topic=topic, data=SerializedContent.from_model(message)
+            )
+
+        await wait_for(lambda: len(received) == 6)
+        assert [content.id for content in received] == [
+            message.id for message in messages
+        ]
+
+    run_with_broadcasters(test)
+
+
+def test_listen_connection_is_restored() -> None:
+    async def test(pool, publishing, receiving) -> None:
+        lost_conn = receiving._listen_conn
+        lost_conn.terminate()
+        await wait_for(lambda: receiving._listen_conn is not lost_conn)
+
+        user = await create_user(pool)
+        topic = get_topic(user)
+        received = await subscribe(receiving, topic)
+        message = await create_message(pool, user, "after reconnect")
+        await publishing.publish(
+            topic=topic, data=SerializedContent.from_model(message)
+        )
+        await wait_for(lambda: received)
+
+    run_with_broadcasters(test)
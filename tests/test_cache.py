@@ -0,0 +1,66 @@
+import pytest
+
+from app.services import cache
+from app.services.cache import TTLCache
+from tests.database import FakeClock
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake_clock = FakeClock()
+    monkeypatch.setattr(cache, "time", fake_clock)
+    return fake_clock
+
+
+def test_entries_expire_after_ttl(clock: FakeClock) -> None:
+    users = TTLCache(maxsize=10, ttl=30)
+    users.set("user", 1)
+    clock.advance(29)
+    assert users.get("user") == 1
+    clock.advance(1)
+    assert users.get("user") is None
+    assert len(users) == 0
+
+
+def test_entry_ttl_can_only_shorten_default_one(clock: FakeClock) -> None:
+    users = TTLCache(maxsize=10, ttl=30)
+    users.set("short", 1, ttl=10)
+    users.set("long", 2, ttl=60)
+    clock.advance(10)
+    assert users.get("short") is None
+    assert users.get("long") == 2
+    clock.advance(20)
+    assert users.get("long") is None
+
+
+def test_non_positive_ttl_or_size_caches_nothing(clock: FakeClock) -> None:
+    users = TTLCache(maxsize=10, ttl=30)
+    users.set("expired", 1, ttl=0)
+    assert users.get("expired") is None
+    disabled = TTLCache(maxsize=0, ttl=30)
+    disabled.set("user", 1)
+    assert disabled.get("user") is None
+
+
+def test_least_recently_used_entries_are_evicted(clock: FakeClock) -> None:
+    users = TTLCache(maxsize=2, ttl=30)
+    users.set("first", 1)
+    users.set("second", 2)
+    assert users.get("first") == 1  # second is the least recently used now
+    users.set("third", 3)
+    assert len(users) == 2
+    assert users.get("second") is None
+    assert users.get("first") == 1
+    assert users.get("third") == 3
+
+
+def test_invalidated_entries_are_gone(clock: FakeClock) -> None:
+    users = TTLCache(maxsize=10, ttl=30)
+    users.set("first", 1)
+    users.set("second", 2)
+    users.invalidate("first")
+    users.invalidate("missing")
+    assert users.get("first") is None
+    assert users.get("second") == 2
+    users.clear()
+    assert len(users) == 0
@@ -0,0 +1,95 @@
+import time
+from datetime import timedelta
+from typing import Any, Iterator, List
+
+import pytest
+
+from app.models.schemas.users import User
+from app.services import cache, jwt
+from app.services.cache import get_tokens_cache
+from app.services.jwt import create_access_token_for_user, get_token_claims
+from tests.database import FakeClock
+
+SECRET_KEY = "jwt-tests-secret-key-of-32-bytes"
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Iterator[FakeClock]:
+    fake_clock = FakeClock()
+    fake_clock.now = time.time()  # tokens expire by the real clock
+    monkeypatch.setattr(cache, "time", fake_clock)
+    monkeypatch.setattr(jwt, "time", fake_clock)
+    get_tokens_cache().clear()
+    yield fake_clock
+    get_tokens_cache().clear()
+
+
+@pytest.fixture
+def decodes(monkeypatch: pytest.MonkeyPatch) -> List[str]:
+    """Tokens actually decoded, ones served from cache aren't listed"""
+    decoded: List[str] = []
+    decode = jwt._decode_token_claims
+
+    def counting_decode(token: str, secret_key: str) -> Any:
+        decoded.append(token)
+        return decode(token, secret_key)
+
+    monkeypatch.setattr(jwt, "_decode_token_claims", counting_decode)
+    return decoded
+
+
+def create_token(expires_td: timedelta) -> str:
+    user = User(username="username", email="user@example.com")
+    return create_access_token_for_user(user, SECRET_KEY, expires_td).token
+
+
+def test_verified_token_is_served_from_cache(
+    clock: FakeClock, decodes: List[str]
+) -> None:
+    token = create_token(timedelta(minutes=1))
+    assert get_token_claims(token, SECRET_KEY)[0] == "username"
+    assert get_token_claims(token, SECRET_KEY)[0] == "username"
+    assert decodes == [token]
+
+
+def test_cached_token_never_outlives_its_expiration(
+    clock: FakeClock, decodes: List[str]
+) -> None:
+    token = create_token(timedelta(minutes=1))
+    _, meta = get_token_claims(token, SECRET_KEY)
+    clock.now = meta.exp.timestamp() - 1
+    get_token_claims(token, SECRET_KEY)
+    assert decodes == [token]
+    clock.now = meta.exp.timestamp()
+    get_token_claims(token, SECRET_KEY)  # still valid by the real clock
+    assert decodes == [token, token]
+
+
+def test_expired_token_is_rejected_and_not_cached(
+    clock: FakeClock, decodes: List[str]
+) -> None:
+    token = create_token(timedelta(seconds=-1))
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            get_token_claims(token, SECRET_KEY)
+    assert decodes == [token, token]
+    assert len(get_tokens_cache()) == 0
+
+
+def test_cached_token_is_verified_against_secret_key(
+    clock: FakeClock, decodes: List[str]
+) -> None:
+    token = create_token(timedelta(minutes=1))
+    get_token_claims(token, SECRET_KEY)
+    with pytest.raises(ValueError):
+        get_token_claims(token, "another-secret-key-of-32-bytes-x")
+
+
+def test_invalidated_token_is_decoded_again(
+    clock: FakeClock, decodes: List[str]
+) -> None:
+    token = create_token(timedelta(minutes=1))
+    get_token_claims(token, SECRET_KEY)
+    get_tokens_cache().invalidate((token, SECRET_KEY))
+    get_token_claims(token, SECRET_KEY)
+    assert decodes == [token, token]
@@ -0,0 +1,77 @@
+"""Messages repository against a local PostgreSQL, see `tests.database`"""
+from typing import List
+
+import asyncpg
+import pytest
+
+from app.db.connection import ConnectionHandle
+from app.db.errors import EntityRelationsMismatch
+from app.db.repositories.messages import MessagesRepository
+from app.models.schemas.messages import MessageInCreate
+from tests.database import create_user, requires_database, run_with_pool
+
+pytestmark = requires_database
+
+
+def test_created_message_numbers_match_stored_ones() -> None:
+    async def test(pool: asyncpg.Pool) -> None:
+        user = await create_user(pool)
+        messages_repo = MessagesRepository(ConnectionHandle(pool))
+        message = await messages_repo.create_message(
+            user=user,
+            message_body=MessageInCreate(
+                content="numbers order", numbers=["+79123456789", "+14155552671"]
+            ),
+        )
+        assert message.numbers == ["+7 912 345-67-89", "+1 415-555-2671"]
+        stored = await messages_repo.get_message_by_id(message_id=message.id)
+        assert stored.numbers == message.numbers
+
+    run_with_pool(test)
+
+
+class NoUpsertMessagesRepository(MessagesRepository):
+    async def _upsert_recipients(self, *, numbers: List[str]) -> None:
+        pass
+
+
+def test_message_with_unlinked_numbers_is_not_stored() -> None:
+    async def test(pool: asyncpg.Pool) -> None:
+        user = await create_user(pool)
+        messages_repo = NoUpsertMessagesRepository(ConnectionHandle(pool))
+        with pytest.raises(EntityRelationsMismatch):
+            await messages_repo.create_message(
+                user=user,
+                message_body=MessageInCreate(
+                    content="no recipients",
+                    # Never upserted by tests, so it has no recipient row
+                    numbers=["+14155552671", "+442079460958"],
+                ),
+            )
+        assert not await pool.fetchval(
+            'SELECT count(*) FROM "public"."message" WHERE user_id = $1', user.id
+        )
+
+    run_with_pool(test)
+
+
+def test_bulk_messages_get_their_own_numbers() -> None:
+    async def test(pool: asyncpg.Pool) -> None:
+        user = await create_user(pool)
+        messages_repo = MessagesRepository(ConnectionHandle(pool))
+        bodies = [
+            MessageInCreate(content=f"bulk {idx}", numbers=numbers)
+            for idx, numbers in enumerate(
+                [["+14155552671"], ["+79123456789", "+14155552671"], ["+79123456789"]]
+            )
+        ]
+        ids = await messages_repo.create_messages_bulk(
+            user=user, messages_bodies=bodies
+        )
+        assert len(ids) == len(bodies)
+        for message_id, body in zip(ids, bodies):
+            stored = await messages_repo.get_message_by_id(message_id=message_id)
+            assert stored.content == body.content
+            assert stored.numbers == body.numbers
+
+    run_with_pool(test)
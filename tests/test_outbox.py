@@ -0,0 +1,96 @@
+"""Outbox dispatcher against a local PostgreSQL, see `tests.database`"""
+from typing import Awaitable, Callable
+
+import asyncpg
+
+from app.core.settings.base import PublishOverflowPolicyTypes
+from app.services.outbox import OutboxDispatcher
+from app.services.sockets import Publisher
+from tests.database import (RecordingBroadcaster, create_message, create_user,
+                            requires_database, run_with_pool)
+
+pytestmark = requires_database
+
+
+def make_publisher(broadcaster: RecordingBroadcaster) -> Publisher:
+    return Publisher(
+        broadcaster,
+        queue_size=100,
+        workers=2,
+        batch_size=10,
+        overflow_policy=PublishOverflowPolicyTypes.block,
+    )
+
+
+def make_dispatcher(publisher: Publisher) -> OutboxDispatcher:
+    return OutboxDispatcher(
+        publisher,
+        workers=0,  # batches are dispatched by tests
+        batch_size=10,
+        poll_interval=0.1,
+        lease_seconds=30,
+        publish_timeout=1,
+    )
+
+
+async def get_status_code(pool: asyncpg.Pool, message_id: int) -> int:
+    return await pool.fetchval(
+        'SELECT status_code FROM "public"."message" WHERE id = $1', message_id
+    )
+
+
+async def get_outbox_count(pool: asyncpg.Pool) -> int:
+    return await pool.fetchval('SELECT count(*) FROM "public"."messageOutbox"')
+
+
+def run_with_empty_outbox(test: Callable[[asyncpg.Pool], Awaitable[None]]) -> None:
+    async def run(pool: asyncpg.Pool) -> None:
+        await pool.execute('DELETE FROM "public"."messageOutbox"')
+        await test(pool)
+
+    run_with_pool(run)
+
+
+def test_delivered_messages_are_marked_pushed() -> None:
+    async def test(pool: asyncpg.Pool) -> None:
+        user = await create_user(pool)
+        message = await create_message(pool, user, "outbox message")
+        broadcaster = RecordingBroadcaster()
+        publisher = make_publisher(broadcaster)
+        dispatcher = make_dispatcher(publisher)
+        await publisher.start()
+        await dispatcher.start(pool)
+        try:
+            assert await dispatcher.dispatch_batch() == 1
+        finally:
+            await publisher.stop()
+
+        assert [content.id for _, content in broadcaster.published] == [message.id]
+        assert await get_status_code(pool, message.id) == 120
+        assert await get_outbox_count(pool) == 0
+
+    run_with_empty_outbox(test)
+
+
+def test_undelivered_messages_are_retried_after_lease() -> None:
+    async def test(pool: asyncpg.Pool) -> None:
+        user = await create_user(pool)
+        message = await create_message(pool, user, "outbox message")
+        publisher = make_publisher(RecordingBroadcaster(fail=True))
+        dispatcher = make_dispatcher(publisher)
+        await publisher.start()
+        await dispatcher.start(pool)
+        try:
+            assert await dispatcher.dispatch_batch() == 1
+            assert await dispatcher.dispatch_batch() == 0  # still leased
+            await pool.execute(
+                'UPDATE "public"."messageOutbox" SET claimed_until = now()'
+            )
+            assert await dispatcher.dispatch_batch() == 1
+        finally:
+            await publisher.stop()
+
+        assert await get_status_code(pool, message.id) == 110
+        assert await get_outbox_count(pool) == 1
+
+    run_with_empty_outbox(test)
@@ -0,0 +1,32 @@
+import base64
+import datetime
+
+import pytest
+
+from app.services.paging import decode_cursor, encode_cursor
+
+
+def encode_raw(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def test_cursor_round_trip_keeps_microseconds() -> None:
+    created_at = datetime.datetime(2026, 10, 18, 10, 15, 38, 123456)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        encode_raw("2026-10-18T10:15:38"),
+        encode_raw("2026-10-18T10:15:38|42|1"),
+        encode_raw("2026-10-18T10:15:38|id"),
+        encode_raw("yesterday|42"),
+        encode_raw("2026-10-18T10:15:38+00:00|42"),
+        base64.urlsafe_b64encode(b"\xff\xfe|42").decode(),
+    ],
+)
+def test_malformed_cursor_is_rejected(cursor: str) -> None:
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
@@ -0,0 +1,128 @@
+"""Messages partitions maintenance against a local PostgreSQL,
+see `tests.database`
+"""
+import datetime
+
+import asyncpg
+
+from app.core.settings.base import RetentionPolicyTypes
+from app.db.partitions.manager import (create_partitions, expire_partitions,
+                                       get_partition_name)
+from tests.database import (create_message, create_user, requires_database,
+                            run_with_pool)
+
+pytestmark = requires_database
+
+GET_MESSAGE_TABLE = """
+SELECT msg.tableoid::regclass::text
+FROM "public"."message" msg
+WHERE msg.id = $1
+"""
+
+MOVE_MESSAGE = """
+WITH moved AS (
+    UPDATE "public"."message" SET created_at = $2 WHERE id = $1
+)
+UPDATE "public"."messageRecipients" SET message_created_at = $2 WHERE message_id = $1
+"""
+
+GET_RECIPIENTS_COUNT = """
+SELECT count(*) FROM "public"."{table}" WHERE message_id = $1
+"""
+
+TABLE_EXISTS = "SELECT to_regclass($1) IS NOT NULL"
+
+
+async def drop_partitions(pool: asyncpg.Pool, month: datetime.date) -> None:
+    for table in ("messageRecipients", "message"):
+        name = get_partition_name(month, table)
+        await pool.execute(f'DROP TABLE IF EXISTS "public"."{name}"')
+
+
+def test_default_partition_rows_are_moved_to_created_partition() -> None:
+    month = datetime.date(2099, 1, 1)
+    name = get_partition_name(month)
+
+    async def test(pool: asyncpg.Pool) -> None:
+        user = await create_user(pool)
+        message = await create_message(pool, user, "far future message")
+        await pool.execute(MOVE_MESSAGE, message.id, datetime.datetime(2099, 1, 15))
+        assert await pool.fetchval(GET_MESSAGE_TABLE, message.id) == "message_default"
+
+        async with pool.acquire() as conn:
+            created = await create_partitions(
+                conn, today=datetime.date(2026, 10, 18), months_ahead=0
+            )
+        try:
+            assert name in created
+            assert await pool.fetchval(GET_MESSAGE_TABLE, message.id) == name
+            recipients_name = get_partition_name(month, "messageRecipients")
+            assert await pool.fetchval(
+                GET_RECIPIENTS_COUNT.format(table=recipients_name), message.id
+            )
+        finally:
+            await drop_partitions(pool, month)
+
+    run_with_pool(test)
+
+
+def test_detached_partitions_keep_recipients_links() -> None:
+    month = datetime.date(2001, 3, 1)
+    name = get_partition_name(month)
+    recipients_name = get_partition_name(month, "messageRecipients")
+
+    async def test(pool: asyncpg.Pool) -> None:
+        user = await create_user(pool)
+        message = await create_message(pool, user, "expired message")
+        await pool.execute(MOVE_MESSAGE, message.id, datetime.datetime(2001, 3, 10))
+        try:
+            async with pool.acquire() as conn:
+                await create_partitions(conn, today=month, months_ahead=0)
+                expired = await expire_partitions(
+                    conn,
+                    today=datetime.date(2001, 5, 1),
+                    keep_months=1,
+                    policy=RetentionPolicyTypes.detach,
+                )
+            assert name in expired
+            assert await pool.fetchval(GET_MESSAGE_TABLE, message.id) is None
+            assert not await pool.fetchval(
+                GET_RECIPIENTS_COUNT.format(table="messageRecipients"), message.id
+            )
+            assert await pool.fetchval(
+                GET_RECIPIENTS_COUNT.format(table=recipients_name), message.id
+            ) == len(message.numbers)
+        finally:
+            await drop_partitions(pool, month)
+
+    run_with_pool(test)
+
+
+def test_dropped_partitions_take_recipients_links_along() -> None:
+    month = datetime.date(2001, 4, 1)
+
+    async def test(pool: asyncpg.Pool) -> None:
+        user = await create_user(pool)
+        message = await create_message(pool, user, "expired message")
+        await pool.execute(MOVE_MESSAGE, message.id, datetime.datetime(2001, 4, 10))
+        try:
+            async with pool.acquire() as conn:
+                await create_partitions(conn, today=month, months_ahead=0)
+                expired = await expire_partitions(
+                    conn,
+                    today=datetime.date(2001, 6, 1),
+                    keep_months=1,
+                    policy=RetentionPolicyTypes.drop,
+                )
+            assert get_partition_name(month) in expired
+            for table in ("message", "messageRecipients"):
+                assert not await pool.fetchval(
+                    TABLE_EXISTS, f'"public"."{get_partition_name(month, table)}"'
+                )
+            assert not await pool.fetchval(
+                GET_RECIPIENTS_COUNT.format(table="messageRecipients"), message.id
+            )
+        finally:
+            await drop_partitions(pool, month)
+
+    run_with_pool(test)
@@ -0,0 +1,26 @@
+import pytest
+
+from app.services.phones import NumbersNormalizer
+
+
+def test_numbers_keep_order_without_duplicates() -> None:
+    normalizer = NumbersNormalizer(maxsize=10)
+    assert normalizer.normalize_many(
+        ["+79123456789", "+14155552671", "+79123456789", "+1 415 555 2671"]
+    ) == ["+7 912 345-67-89", "+1 415-555-2671"]
+
+
+def test_repeated_numbers_are_served_from_cache() -> None:
+    normalizer = NumbersNormalizer(maxsize=10)
+    normalizer.normalize_many(["+79123456789", "+79123456789"])
+    assert normalizer.hit_ratio == 0.0  # duplicates of one call aren't looked up
+    normalizer.normalize_many(["+79123456789"])
+    assert normalizer.hit_ratio == 0.5
+
+
+def test_invalid_numbers_are_rejected_and_not_cached() -> None:
+    normalizer = NumbersNormalizer(maxsize=10)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            normalizer.normalize_many(["+14155552671", "+1000"])
+    assert normalizer.hit_ratio == 0.25  # only the repeated valid number hit
@@ -0,0 +1,45 @@
+import asyncio
+
+import asyncpg
+import pytest
+
+from app.db.connection import ConnectionHandle
+from app.db.queries.prepared import (HOT_QUERIES, PreparedQueries,
+                                     _supports_private_prepare)
+from app.db.queries.queries import queries
+from tests.database import TEST_DATABASE_URL, create_pool, requires_database
+
+
+@pytest.mark.parametrize(
+    "version, supported",
+    [
+        ("0.26.1", False),
+        ("0.27.0", True),
+        ("0.32.0", True),
+        ("0.33.0rc1", False),
+        ("1.0.0", False),
+    ],
+)
+def test_private_prepare_is_used_on_known_versions(
+    version: str, supported: bool
+) -> None:
+    assert _supports_private_prepare(version) is supported
+
+
+@requires_database
+def test_runs_on_warmed_up_connections_are_counted_as_warm() -> None:
+    async def run() -> PreparedQueries:
+        await (await create_pool()).close()  # migrated
+        registry = PreparedQueries(queries, HOT_QUERIES)
+        pool = await asyncpg.create_pool(
+            TEST_DATABASE_URL, min_size=1, max_size=1, init=registry.init_connection
+        )
+        try:
+            for _ in range(2):
+                await registry.get_message_by_id(ConnectionHandle(pool), message_id=0)
+        finally:
+            await pool.close()
+        return registry
+
+    registry = asyncio.run(run())
+    assert (registry.warm_runs, registry.cold_runs) == (2, 0)
@@ -0,0 +1,72 @@
+import asyncio
+from typing import Any, List, Tuple
+
+import pytest
+
+from app.core.settings.base import PublishOverflowPolicyTypes
+from app.services.sockets import Publisher
+from tests.database import RecordingBroadcaster
+
+
+def make_publisher(
+    broadcaster: RecordingBroadcaster,
+    overflow_policy: PublishOverflowPolicyTypes = PublishOverflowPolicyTypes.block,
+    queue_size: int = 100,
+) -> Publisher:
+    return Publisher(
+        broadcaster,
+        queue_size=queue_size,
+        workers=2,
+        batch_size=10,
+        overflow_policy=overflow_policy,
+    )
+
+
+def test_publish_before_start_is_rejected() -> None:
+    publisher = make_publisher(RecordingBroadcaster())
+    with pytest.raises(RuntimeError):
+        asyncio.run(publisher.publish(topic="topic", data=1))
+
+
+def test_stop_flushes_content_in_topic_order() -> None:
+    async def run() -> List[Tuple[str, Any]]:
+        broadcaster = RecordingBroadcaster()
+        publisher = make_publisher(broadcaster)
+        await publisher.start()
+        deliveries = [
+            await publisher.publish(topic=f"topic-{index % 3}", data=index)
+            for index in range(50)
+        ]
+        await publisher.stop(timeout=5)
+        assert all(delivered.result() for delivered in deliveries)
+        with pytest.raises(RuntimeError):
+            await publisher.publish(topic="topic-0", data=50)
+        return broadcaster.published
+
+    published = asyncio.run(run())
+    assert len(published) == 50
+    for topic in ("topic-0", "topic-1", "topic-2"):
+        items = [
+            data for published_topic, data in published if published_topic == topic
+        ]
+        assert items == sorted(items)
+
+
+def test_stop_does_not_hang_with_full_drop_oldest_queues() -> None:
+    async def run() -> Publisher:
+        publisher = make_publisher(
+            RecordingBroadcaster(delay=0.01),
+            overflow_policy=PublishOverflowPolicyTypes.drop_oldest,
+            queue_size=4,
+        )
+        await publisher.start()
+        deliveries = [
+            await publisher.publish(topic="topic", data=index) for index in range(100)
+        ]
+        await asyncio.wait_for(publisher.stop(timeout=1), timeout=2)
+        assert all(delivered.done() for delivered in deliveries)
+        assert not all(delivered.result() for delivered in deliveries)
+        return publisher
+
+    publisher = asyncio.run(run())
+    assert publisher.dropped_count > 0
@@ -0,0 +1,107 @@
+"""Replay to reconnecting subscribers against a local PostgreSQL,
+see `tests.database`
+"""
+import asyncio
+from typing import Any, List, Tuple
+
+from app.services.broadcasting import RWPubSubEndpoint, SerializedContent
+from app.services.jwt import create_access_token_for_user
+from app.services.replay import ReplayBuffer
+from tests.database import (create_message, create_pool, create_user,
+                            get_topic, requires_database)
+
+pytestmark = requires_database
+
+SECRET_KEY = "replay-tests-secret-key-of-32-bytes"
+
+
+class RecordingRemote:
+    def __init__(self) -> None:
+        self.notified: List[Tuple[str, Any]] = []
+
+    async def notify(self, *, subscription: Any, data: Any) -> None:
+        self.notified.append((subscription.topic, data))
+
+
+class FakeChannel:
+    id = "channel"
+
+    def __init__(self) -> None:
+        self.other = RecordingRemote()
+
+
+def run_replay(
+    token_owner: int, limit: int = 10, live_after: bool = False
+) -> Tuple[List[Any], List[int]]:
+    """Subscribe to the first user's topic with a token of `token_owner`,
+    returns notified data and IDs of the first user's messages
+    """
+
+    async def run() -> Tuple[List[Any], List[int]]:
+        pool = await create_pool()
+        try:
+            users = [await create_user(pool), await create_user(pool)]
+            messages = [
+                await create_message(pool, users[0], f"message {index}")
+                for index in range(3)
+            ]
+            # Buffer is disabled, so replay always goes to database
+            endpoint = RWPubSubEndpoint(
+                replay_buffer=ReplayBuffer(size=0, max_topics=0),
+                replay_db_limit=limit,
+                secret_key=SECRET_KEY,
+            )
+            endpoint.pool = pool
+            methods = endpoint.methods._copy_()
+            channel = FakeChannel()
+            methods._set_channel_(channel)
+
+            token = create_access_token_for_user(users[token_owner], SECRET_KEY)
+            topic = get_topic(users[0])
+            assert await methods.subscribe(
+                [topic], last_message_id=messages[0].id - 1, token=token.token
+            )
+            if live_after:
+                for message in (messages[0], messages[2]):
+                    await endpoint.publish(topic, SerializedContent.from_model(message))
+            await asyncio.gather(*endpoint._tasks)
+            return [data for _, data in channel.other.notified], [
+                message.id for message in messages
+            ]
+        finally:
+            await pool.close()
+
+    return asyncio.run(run())
+
+
+def get_ids(notified: List[Any]) -> List[Any]:
+    return [
+        data.id if isinstance(data, SerializedContent) else data for data in notified
+    ]
+
+
+def test_missed_messages_are_replayed_to_token_owner() -> None:
+    notified, message_ids = run_replay(token_owner=0)
+    assert get_ids(notified) == message_ids
+
+
+def test_other_users_messages_are_not_replayed() -> None:
+    notified, _ = run_replay(token_owner=1)
+    assert notified == []
+
+
+def test_truncated_replay_is_signalled() -> None:
+    notified, message_ids = run_replay(token_owner=0, limit=2)
+    assert get_ids(notified) == [
+        *message_ids[:2],
+        {"replayTruncated": True, "lastMessageId": message_ids[1]},
+    ]
+
+
+def test_live_content_goes_after_replay_without_duplicates() -> None:
+    notified, message_ids = run_replay(token_owner=0, limit=2, live_after=True)
+    assert get_ids(notified) == [
+        *message_ids[:2],
+        {"replayTruncated": True, "lastMessageId": message_ids[1]},
+        message_ids[2],
+    ]
@@ -0,0 +1,43 @@
+from typing import Any, List, Optional
+
+from app.services.replay import ReplayBuffer
+
+
+def make_buffer(ids: list, size: int = 3) -> ReplayBuffer:
+    buffer = ReplayBuffer(size=size, max_topics=10)
+    for content_id in ids:
+        buffer.record("topic", content_id, content_id)
+    return buffer
+
+
+def get_ids(buffer: ReplayBuffer, topic: str, last_id: int) -> Optional[List[Any]]:
+    items = buffer.since(topic, last_id)
+    return None if items is None else [content for _, content in items]
+
+
+def test_content_published_late_is_replayed_after_last_seen() -> None:
+    buffer = make_buffer([104, 105, 103])
+    assert get_ids(buffer, "topic", 105) == [103]
+    assert get_ids(buffer, "topic", 104) == [105, 103]
+
+
+def test_floor_is_the_highest_evicted_id() -> None:
+    # 105 is evicted before 103, so 104 can't be covered by the buffer anymore
+    buffer = make_buffer([105, 103, 106, 107, 108])
+    assert get_ids(buffer, "topic", 104) is None
+    assert get_ids(buffer, "topic", 105) == [106, 107, 108]
+
+
+def test_gap_older_than_buffer_is_not_covered() -> None:
+    buffer = make_buffer([1, 2, 3, 4, 5])
+    assert get_ids(buffer, "topic", 1) is None
+    assert get_ids(buffer, "topic", 2) == [3, 4, 5]
+    assert get_ids(buffer, "other", 2) is None
+
+
+def test_least_recent_topics_are_evicted() -> None:
+    buffer = ReplayBuffer(size=3, max_topics=2)
+    for topic in ("first", "second", "third"):
+        buffer.record(topic, 1, topic)
+    assert get_ids(buffer, "first", 0) is None
+    assert get_ids(buffer, "third", 0) == ["third"]
@@ -0,0 +1,135 @@
+"""Fast JSON responses have to match `response_model` output byte for byte"""
+import asyncio
+import datetime
+from typing import Any, Dict, List, Optional
+
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app.db.catalogs import (StatusesCatalog, get_statuses_catalog,
+                             set_statuses_catalog)
+from app.db.repositories.messages import message_from_row
+from app.main import app
+from app.models.schemas.messages import MessagesInResponse
+from app.services import paging, serialization
+
+STATUSES = [
+    {
+        "id": status_id,
+        "status_header_id": 1,
+        "status_code": code,
+        "status_code_name": name,
+        "status_code_description": f"Сообщение {name}",
+    }
+    for status_id, (code, name) in enumerate(
+        [(110, "created"), (120, "pushed"), (130, "received"), (140, "sent")], 1
+    )
+]
+
+
+@pytest.fixture(autouse=True)
+def statuses_catalog() -> Any:
+    previous = get_statuses_catalog()
+    set_statuses_catalog(StatusesCatalog(STATUSES))
+    yield
+    set_statuses_catalog(previous)
+
+
+def make_row(message_id: int, **overrides: Any) -> Dict[str, Any]:
+    row = {
+        "id": message_id,
+        "user_id": 7,
+        "author_id": 7,
+        "status_code": 110,
+        "created_at": datetime.datetime(2023, 1, 31, 23, 59, 59, 123456),
+        "updated_at": datetime.datetime(2023, 2, 1, 0, 0, 0, 1),
+        "content": 'Привет, мир! 👋 «quotes» "escaped" \\ tab\t',
+        "numbers_arr": ["+7 912 345-67-89", "+1 415-555-2671"],
+    }
+    row.update(overrides)
+    return row
+
+
+ROWS = [
+    make_row(3),
+    make_row(2, status_code=140, content="plain ascii content"),
+    make_row(
+        1,
+        status_code=130,
+        created_at=datetime.datetime(2023, 1, 1, 0, 0, 0),
+        updated_at=datetime.datetime(2023, 1, 1, 0, 0, 0, 999999),
+        numbers_arr=[],
+    ),
+]
+
+
+def get_route(name: str) -> APIRoute:
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.name == name:
+            return route
+    raise LookupError(name)
+
+
+def render_response_model(route_name: str, content: Any) -> bytes:
+    route = get_route(route_name)
+    serialized = asyncio.run(
+        serialize_response(
+            field=route.response_field,
+            response_content=content,
+            include=route.response_model_include,
+            exclude=route.response_model_exclude,
+            by_alias=route.response_model_by_alias,
+            exclude_unset=route.response_model_exclude_unset,
+            exclude_defaults=route.response_model_exclude_defaults,
+            exclude_none=route.response_model_exclude_none,
+        )
+    )
+    return JSONResponse(serialized).body
+
+
+def render_fast_list(rows: List[Dict[str, Any]], next_cursor: Optional[str]) -> bytes:
+    return serialization.FastJSONResponse(
+        {
+            "messages": [serialization.message_row_to_dict(row) for row in rows],
+            "nextCursor": next_cursor,
+        }
+    ).body
+
+
+@pytest.mark.parametrize(
+    "next_cursor",
+    [None, paging.encode_cursor(ROWS[-1]["created_at"], ROWS[-1]["id"])],
+)
+def test_messages_list(next_cursor: Optional[str]) -> None:
+    expected = render_response_model(
+        "messages:get-messages",
+        MessagesInResponse(
+            messages=[message_from_row(row) for row in ROWS], next_cursor=next_cursor
+        ),
+    )
+    assert render_fast_list(ROWS, next_cursor) == expected
+
+
+def test_pending_messages() -> None:
+    expected = render_response_model(
+        "messages:get-pending-messages",
+        MessagesInResponse(messages=[message_from_row(row) for row in ROWS]),
+    )
+    assert render_fast_list(ROWS, None) == expected
+
+
+def test_empty_messages_list() -> None:
+    expected = render_response_model(
+        "messages:get-messages", MessagesInResponse(messages=[])
+    )
+    assert render_fast_list([], None) == expected
+
+
+@pytest.mark.parametrize("row", ROWS)
+def test_concrete_message(row: Dict[str, Any]) -> None:
+    expected = render_response_model(
+        "messages:get-concrete-message", message_from_row(row)
+    )
+    fast = serialization.FastJSONResponse(serialization.message_row_to_dict(row))
+    assert fast.body == expected
@@ -0,0 +1,44 @@
+import asyncio
+from typing import List
+
+import pytest
+from loguru import logger
+
+from app.core.config import get_app_settings
+from app.core.settings.app import AppSettings
+from app.core.settings.base import PubSubBackendTypes
+from app.services.outbox import run_dispatcher
+
+
+def get_warnings(**settings: object) -> List[str]:
+    warnings: List[str] = []
+    handler_id = logger.add(warnings.append, level="WARNING", format="{message}")
+    try:
+        AppSettings(
+            database_url="postgresql://postgres@localhost/db",
+            secret_key="secret",
+            **settings,
+        )
+    finally:
+        logger.remove(handler_id)
+    return warnings
+
+
+def test_in_app_dispatch_with_local_backend_is_warned_about() -> None:
+    assert get_warnings(
+        outbox_dispatch_in_app=True, pubsub_backend=PubSubBackendTypes.local
+    )
+    assert not get_warnings(
+        outbox_dispatch_in_app=True, pubsub_backend=PubSubBackendTypes.postgres
+    )
+    assert not get_warnings(
+        outbox_dispatch_in_app=False, pubsub_backend=PubSubBackendTypes.local
+    )
+
+
+def test_standalone_dispatcher_requires_postgres_backend(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(get_app_settings(), "pubsub_backend", PubSubBackendTypes.local)
+    with pytest.raises(RuntimeError):
+        asyncio.run(run_dispatcher())